@@ -0,0 +1,98 @@
+"""Mixed read/write throughput: stock SQLite engine vs the tuned engines.
+
+Usage: python -m benchmarks.bench_concurrency [--seconds 5] [--readers 8] [--writers 4]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from database import create_db_engine
+from models import Base, Book
+from routers.books import BookListParams, list_books, save_rating
+
+BOOKS = 500
+USERS = 200
+
+def populate(engine):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Book), [
+            {"title": f"Book {i}", "isbn": f"BENCH-{i}", "publication_year": 2000}
+            for i in range(BOOKS)
+        ])
+
+def stock_engines(url):
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    return engine, engine
+
+def tuned_engines(url):
+    return create_db_engine(url), create_db_engine(url, read_only=True)
+
+def run(make_engines, seconds, readers, writers):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        write_engine, read_engine = make_engines(url)
+        populate(write_engine)
+        WriteSession = sessionmaker(bind=write_engine, autoflush=False)
+        ReadSession = sessionmaker(bind=read_engine, autoflush=False)
+        counts = {"reads": 0, "writes": 0, "locked": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def reader():
+            params = BookListParams(limit=20)
+            rng = random.Random()
+            while time.perf_counter() < deadline:
+                params.skip = rng.randrange(BOOKS - 20)
+                with ReadSession() as db:
+                    try:
+                        list_books(db, params)
+                        key = "reads"
+                    except OperationalError:
+                        key = "locked"
+                with lock:
+                    counts[key] += 1
+
+        def writer():
+            rng = random.Random()
+            while time.perf_counter() < deadline:
+                with WriteSession() as db:
+                    try:
+                        save_rating(db, rng.randrange(1, BOOKS + 1), rng.randrange(1, USERS + 1),
+                                    float(rng.randint(0, 5)))
+                        key = "writes"
+                    except OperationalError:
+                        db.rollback()
+                        key = "locked"
+                with lock:
+                    counts[key] += 1
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        write_engine.dispose()
+        read_engine.dispose()
+    return {key: value / seconds for key, value in counts.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'engine':>8} {'reads/s':>10} {'writes/s':>10} {'locked/s':>10}")
+    for name, make_engines in (("stock", stock_engines), ("tuned", tuned_engines)):
+        result = run(make_engines, args.seconds, args.readers, args.writers)
+        print(f"{name:>8} {result['reads']:>10.1f} {result['writes']:>10.1f} {result['locked']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
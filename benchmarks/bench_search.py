@@ -0,0 +1,76 @@
+"""Compare the FTS5 search path with the old LIKE scan.
+
+Usage: python -m benchmarks.bench_search [--sizes 1000 10000 100000]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from sqlalchemy import String, create_engine, func, insert
+from sqlalchemy.orm import Session
+from models import Base, Book
+from search import search_ids
+
+SYLLABLES = "ka lo mi ren tor vas quel din sha pru bex nol ith gar fen zu".split()
+# ~4000 distinct words so a term matches a realistic slice of the catalog.
+WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+QUERIES = ["kalomi", "renvas", "quel", "dinsha bexnol", "978-00000123"]
+
+def populate(engine, count, batch_size=5000):
+    rng = random.Random(count)
+    with engine.begin() as conn:
+        for start in range(0, count, batch_size):
+            rows = [
+                {
+                    "title": " ".join(rng.choice(WORDS) for _ in range(3)).title(),
+                    "isbn": f"978-{i:010d}",
+                    "publication_year": rng.randint(1800, 2024),
+                    "description": " ".join(rng.choice(WORDS) for _ in range(20)),
+                }
+                for i in range(start, min(start + batch_size, count))
+            ]
+            conn.execute(insert(Book), rows)
+
+def like_ids(db, query):
+    # The pre-FTS query, unbounded like the endpoint was.
+    query = query.lower()
+    return [row[0] for row in db.query(Book.id).filter(
+        (func.lower(Book.title).like(f"%{query}%")) |
+        (func.lower(Book.isbn).like(f"%{query}%")) |
+        (func.cast(Book.publication_year, String).like(f"%{query}%"))
+    ).all()]
+
+def fts_ids(db, query, limit=100):
+    return search_ids(db, "books_fts", query, limit=limit)
+
+def median_ms(fn, db, repeats):
+    timings = []
+    for _ in range(repeats):
+        for query in QUERIES:
+            started = time.perf_counter()
+            fn(db, query)
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'books':>10} {'LIKE ms':>10} {'FTS5 ms':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            Base.metadata.create_all(bind=engine)
+            populate(engine, size)
+            with Session(engine) as db:
+                like = median_ms(like_ids, db, args.repeats)
+                fts = median_ms(fts_ids, db, args.repeats)
+            engine.dispose()
+        print(f"{size:>10} {like:>10.2f} {fts:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Microbenchmark: serialising books through Pydantic vs the fast path.
+
+Usage: python -m benchmarks.bench_serialization [--books 1000] [--runs 5]
+
+tests/test_api.py checks that both paths produce the same JSON.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import List
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+from database import create_db_engine, init_db
+from models import Author, Book, UserRating, book_author
+from routers.books import BookListParams, list_books, list_book_rows
+from schemas import Book as BookSchema
+from serialization import FastJSONResponse
+
+AUTHORS = 100
+RATINGS_PER_BOOK = 5
+
+def populate(engine, count):
+    init_db(bind=engine)
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        conn.execute(insert(Author), [
+            {"name": f"Author {i}", "biography": "Biography " * 20} for i in range(AUTHORS)
+        ])
+        conn.execute(insert(Book), [
+            {
+                "title": f"Book {i}", "isbn": f"SERIAL-{i}", "publication_year": 2000,
+                "description": "Description " * 40, "rating": 3.0,
+                "rating_sum": 15.0, "rating_count": RATINGS_PER_BOOK,
+            }
+            for i in range(count)
+        ])
+        conn.execute(insert(book_author), [
+            {"book_id": book_id, "author_id": author_id}
+            for book_id in range(1, count + 1)
+            for author_id in rng.sample(range(1, AUTHORS + 1), 2)
+        ])
+        conn.execute(insert(UserRating), [
+            {"book_id": book_id, "user_id": user_id, "rating": 3.0}
+            for book_id in range(1, count + 1)
+            for user_id in range(1, RATINGS_PER_BOOK + 1)
+        ])
+
+def best_of(fn, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+def measure(engine, count, runs):
+    populate(engine, count)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    params = BookListParams(limit=count)
+    adapter = TypeAdapter(List[BookSchema])
+
+    with Session() as db:
+        books, _ = list_books(db, params)
+        rows, _ = list_book_rows(db, params)
+
+    # What FastAPI does with response_model: validate, dump, json.dumps.
+    def pydantic_encode(items):
+        return json.dumps(adapter.dump_python(adapter.validate_python(items), mode="json")).encode()
+
+    def fast_encode(items):
+        return FastJSONResponse(items).body
+
+    def end_to_end(load, encode):
+        def run():
+            with Session() as db:
+                encode(load(db, params)[0])
+        return run
+
+    return {
+        "pydantic encode": best_of(lambda: pydantic_encode(books), runs),
+        "fast encode": best_of(lambda: fast_encode(rows), runs),
+        "pydantic load+encode": best_of(end_to_end(list_books, pydantic_encode), runs),
+        "fast load+encode": best_of(end_to_end(list_book_rows, fast_encode), runs),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'serialization.db')}")
+        results = measure(engine, args.books, args.runs)
+        engine.dispose()
+    for name, ms in results.items():
+        print(f"{name:>22}: {ms:7.1f} ms per {args.books} books")
+
+if __name__ == "__main__":
+    main()
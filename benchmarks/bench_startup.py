@@ -0,0 +1,44 @@
+"""Time `import main` and the explicit schema step in fresh interpreters.
+
+Usage: python -m benchmarks.bench_startup [--runs 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+IMPORT_APP = (
+    "import time; started = time.perf_counter(); import main; "
+    "print(time.perf_counter() - started)"
+)
+INIT_DB = (
+    "import time; import database, models; started = time.perf_counter(); "
+    "database.init_db(); print(time.perf_counter() - started)"
+)
+
+def time_snippet(snippet, env):
+    output = subprocess.run(
+        [sys.executable, "-c", snippet], env=env, check=True,
+        capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1]) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        cold_init = time_snippet(INIT_DB, env)
+        imports = [time_snippet(IMPORT_APP, env) for _ in range(args.runs)]
+        warm_init = [time_snippet(INIT_DB, env) for _ in range(args.runs)]
+
+    print(f"import main (no DDL):       median {statistics.median(imports):7.1f} ms")
+    print(f"init_db on a new database:         {cold_init:7.1f} ms")
+    print(f"init_db on an existing one: median {statistics.median(warm_init):7.1f} ms")
+
+if __name__ == "__main__":
+    main()
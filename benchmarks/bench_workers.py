@@ -0,0 +1,157 @@
+"""Throughput of serve.py as the number of worker processes grows.
+
+Starts the launcher against a generated catalog for each worker count, drives
+it with keep-alive HTTP clients in separate processes and prints requests per
+second and latency percentiles for a read-heavy mix.
+
+Usage: python -m benchmarks.bench_workers [--workers 1 2 4] [--seconds 10]
+           [--clients 4] [--connections 8] [--cache]
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from sqlalchemy import insert
+from database import create_db_engine
+from manage import migrate
+from models import Author, Book, book_author
+
+BOOKS = 5000
+AUTHORS = 500
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def populate(url):
+    engine = create_db_engine(url)
+    migrate(bind=engine)
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        conn.execute(insert(Author), [{"name": f"Author {i}"} for i in range(AUTHORS)])
+        conn.execute(insert(Book), [
+            {
+                "title": f"Book {i}", "isbn": f"LOAD-{i}", "publication_year": 1950 + i % 70,
+                "description": f"Generated book number {i}", "rating": 0.0,
+                "rating_sum": 0.0, "rating_count": 0,
+            }
+            for i in range(BOOKS)
+        ])
+        conn.execute(insert(book_author), [
+            {"book_id": book_id, "author_id": rng.randint(1, AUTHORS)}
+            for book_id in range(1, BOOKS + 1)
+        ])
+    engine.dispose()
+
+def random_path(rng):
+    roll = rng.random()
+    if roll < 0.4:
+        return f"/books/?view=summary&limit=20&skip={rng.randrange(BOOKS - 20)}"
+    if roll < 0.7:
+        return f"/books/{rng.randint(1, BOOKS)}"
+    if roll < 0.9:
+        return f"/books/search/{rng.randrange(BOOKS)}"
+    return f"/authors/?limit=20&skip={rng.randrange(AUTHORS - 20)}"
+
+def client_process(port, seconds, connections):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def run():
+        rng = random.Random()
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                conn.request("GET", random_path(rng))
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port)
+                continue
+            local.append(time.perf_counter() - started)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=run) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+def wait_until_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/authors/?limit=1")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("serve.py did not start")
+
+def run(workers, args, env, port):
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--host", "127.0.0.1",
+         "--port", str(port)],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(port)
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.starmap(
+                client_process, [(port, args.seconds, args.connections)] * args.clients
+            )
+    finally:
+        server.terminate()
+        server.wait()
+    latencies = sorted(latency for result, _ in results for latency in result)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "rps": len(latencies) / args.seconds,
+        "p50": quantiles[49] * 1000,
+        "p99": quantiles[98] * 1000,
+        "errors": sum(failed for _, failed in results),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=4, help="client processes")
+    parser.add_argument("--connections", type=int, default=8, help="keep-alive connections per client")
+    parser.add_argument("--cache", action="store_true", help="leave the response cache on")
+    parser.add_argument("--port", type=int, default=8790)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+        populate(url)
+        env = dict(
+            os.environ, DATABASE_URL=url,
+            RESPONSE_CACHE_ENABLED="1" if args.cache else "0"
+        )
+        print(f"cpus: {os.cpu_count()}, cache: {'on' if args.cache else 'off'}")
+        print(f"{'workers':>8} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for workers in args.workers:
+            result = run(workers, args, env, args.port)
+            print(f"{workers:>8} {result['rps']:>10.1f} {result['p50']:>8.1f} "
+                  f"{result['p99']:>8.1f} {result['errors']:>7}")
+
+if __name__ == "__main__":
+    main()
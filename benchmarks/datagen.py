@@ -0,0 +1,73 @@
+"""Synthetic catalog: N authors, M books and K ratings from a fixed seed.
+
+Ratings are skewed towards a few popular books, like a real catalog, and
+the books' rating counters are rebuilt from them at the end.
+"""
+import random
+from sqlalchemy import insert
+from manage import rebuild_ratings
+from models import Author, Book, User, UserRating, book_author
+
+SYLLABLES = "ka lo mi ren tor vas quel din sha pru bex nol ith gar fen zu".split()
+WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+
+def batched(rows, size=5000):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def pick_book(rng, books):
+    # Half uniform, half Pareto: a handful of books collect many ratings.
+    if rng.random() < 0.5:
+        return rng.randint(1, books)
+    return min(int(rng.paretovariate(1.0)), books)
+
+def generate(engine, authors: int, books: int, ratings: int, seed: int = 0):
+    rng = random.Random(seed)
+    users = max(1, ratings // 20)
+    target = min(ratings, users * books)
+    pairs = set()
+    attempts = 0
+    while len(pairs) < target and attempts < target * 10:
+        attempts += 1
+        pairs.add((rng.randint(1, users), pick_book(rng, books)))
+
+    with engine.begin() as conn:
+        for rows in batched([
+            {"name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}",
+             "biography": " ".join(rng.choice(WORDS) for _ in range(12))}
+            for _ in range(authors)
+        ]):
+            conn.execute(insert(Author), rows)
+        for rows in batched([
+            {
+                "title": " ".join(rng.choice(WORDS) for _ in range(3)).title(),
+                "isbn": f"GEN-{seed}-{i:08d}",
+                "publication_year": rng.randint(1800, 2024),
+                "description": " ".join(rng.choice(WORDS) for _ in range(20)),
+            }
+            for i in range(books)
+        ]):
+            conn.execute(insert(Book), rows)
+        links = {
+            (book_id, rng.randint(1, authors))
+            for book_id in range(1, books + 1)
+            for _ in range(rng.choice((1, 1, 1, 2)))
+        } if authors else set()
+        for rows in batched([{"book_id": b, "author_id": a} for b, a in sorted(links)]):
+            conn.execute(insert(book_author), rows)
+        for rows in batched([
+            {"username": f"reader{i}", "email": f"reader{i}@example.com",
+             "hashed_password": "!", "is_active": 1}
+            for i in range(1, users + 1)
+        ] if ratings else []):
+            conn.execute(insert(User), rows)
+        for rows in batched([
+            {"user_id": user_id, "book_id": book_id, "rating": float(rng.randint(1, 5))}
+            for user_id, book_id in sorted(pairs)
+        ]):
+            conn.execute(insert(UserRating), rows)
+        rebuild_ratings(conn)
+    return {"authors": authors, "books": books, "ratings": len(pairs), "users": users if ratings else 0}
+
+def random_query(rng):
+    return rng.choice(WORDS)
@@ -0,0 +1,88 @@
+"""Request scenarios for benchmarks.suite.
+
+Each scenario is a generator: before every yield it may prepare data
+(untimed), then yields one (method, url, kwargs) request to be timed.
+"""
+import json
+from sqlalchemy import insert
+from models import Author, Book, book_author
+from benchmarks.datagen import random_query
+
+def list_books(ctx, rng):
+    while True:
+        yield "GET", f"/books/?limit=50&skip={rng.randrange(max(ctx.books - 50, 1))}", {}
+
+def list_books_summary(ctx, rng):
+    while True:
+        yield "GET", f"/books/?view=summary&limit=50&skip={rng.randrange(max(ctx.books - 50, 1))}", {}
+
+def list_books_cursor(ctx, rng):
+    cursor = None
+    while True:
+        url = "/books/?limit=50" + (f"&cursor={cursor}" if cursor else "")
+        response = yield "GET", url, {}
+        cursor = response.headers.get("X-Next-Cursor")
+
+def get_book(ctx, rng):
+    while True:
+        yield "GET", f"/books/{rng.randint(1, ctx.books)}", {}
+
+def search_books(ctx, rng):
+    while True:
+        yield "GET", f"/books/search/{random_query(rng)}", {}
+
+def list_authors(ctx, rng):
+    while True:
+        yield "GET", f"/authors/?limit=50&skip={rng.randrange(max(ctx.authors - 50, 1))}", {}
+
+def rate_book(ctx, rng):
+    while True:
+        yield "POST", f"/books/{rng.randint(1, ctx.books)}/rate", {
+            "json": {"rating": rng.randint(1, 5)}, "headers": ctx.auth
+        }
+
+def bulk_import(ctx, rng):
+    batch = 0
+    while True:
+        batch += 1
+        rows = [
+            {"title": f"Bulk {batch}-{i}", "isbn": f"BULK-{batch}-{i}", "publication_year": 2000,
+             "author_ids": [rng.randint(1, ctx.authors)]}
+            for i in range(ctx.bulk_rows)
+        ]
+        body = "".join(json.dumps(row) + "\n" for row in rows)
+        yield "POST", "/books/bulk", {
+            "content": body,
+            "headers": dict(ctx.auth, **{"Content-Type": "application/x-ndjson"})
+        }
+
+def delete_author(ctx, rng):
+    batch = 0
+    while True:
+        batch += 1
+        # Untimed setup: an author with a few books of their own.
+        with ctx.engine.begin() as conn:
+            author_id = conn.execute(insert(Author), {"name": f"Doomed {batch}"}).inserted_primary_key[0]
+            conn.execute(insert(Book), [
+                {"title": f"Doomed {batch}-{i}", "isbn": f"DOOMED-{batch}-{i}", "publication_year": 2000}
+                for i in range(5)
+            ])
+            book_ids = [row[0] for row in conn.exec_driver_sql(
+                "SELECT id FROM books WHERE isbn LIKE ?", (f"DOOMED-{batch}-%",)
+            )]
+            conn.execute(insert(book_author), [
+                {"book_id": book_id, "author_id": author_id} for book_id in book_ids
+            ])
+        yield "DELETE", f"/authors/{author_id}", {"headers": ctx.auth}
+
+SCENARIOS = {
+    "list_books": list_books,
+    "list_books_summary": list_books_summary,
+    "list_books_cursor": list_books_cursor,
+    "get_book": get_book,
+    "search_books": search_books,
+    "list_authors": list_authors,
+    "rate_book": rate_book,
+    "bulk_import": bulk_import,
+    "delete_author": delete_author,
+}
@@ -0,0 +1,166 @@
+"""API benchmark suite: latency percentiles, throughput and SQL per request.
+
+Generates a catalog in a throwaway database, drives each scenario through the
+app in-process and writes machine-readable results. With --baseline, prints
+how each scenario moved against an earlier results file.
+
+Usage: python -m benchmarks.suite [--authors 500] [--books 10000] [--ratings 50000]
+           [--iterations 200] [--scenarios list_books search_books ...]
+           [--output results.json] [--baseline previous.json] [--cache]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from types import SimpleNamespace
+
+def percentiles(samples):
+    if len(samples) < 2:
+        value = samples[0] if samples else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_scenario(client, engines, scenario, ctx, iterations, seed):
+    from sqlalchemy import event
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+
+    requests = scenario(ctx, random.Random(seed))
+    method, url, kwargs = next(requests)
+    latencies, queries, errors = [], [], 0
+    started_all = time.perf_counter()
+    for _ in range(iterations):
+        statements.clear()
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", count)
+        started = time.perf_counter()
+        response = client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", count)
+        latencies.append(elapsed * 1000)
+        queries.append(len(statements))
+        if response.status_code >= 400:
+            errors += 1
+        method, url, kwargs = requests.send(response)
+    wall = time.perf_counter() - started_all
+
+    result = {name: round(value, 3) for name, value in percentiles(latencies).items()}
+    result.update(
+        requests=iterations,
+        errors=errors,
+        mean_ms=round(statistics.fmean(latencies), 3),
+        throughput_rps=round(iterations / sum(latencies) * 1000, 1),
+        wall_s=round(wall, 3),
+        queries_per_request=round(statistics.fmean(queries), 2),
+        max_queries=max(queries),
+    )
+    return result
+
+def compare(results, baseline):
+    print(f"\n{'scenario':>20} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>9}  vs baseline")
+    for name, current in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        deltas = [
+            f"{(current[key] - before[key]) / before[key] * 100:+8.1f}%" if before[key] else "      n/a"
+            for key in ("p50", "p95", "p99", "queries_per_request")
+        ]
+        print(f"{name:>20} {' '.join(deltas)}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--authors", type=int, default=500)
+    parser.add_argument("--books", type=int, default=10000)
+    parser.add_argument("--ratings", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--bulk-rows", type=int, default=500)
+    parser.add_argument("--scenarios", nargs="+")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", action="store_true", help="leave the response cache on")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.TemporaryDirectory()
+    # The app reads its settings at import, so they are set before importing it.
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+    os.environ["RESPONSE_CACHE_ENABLED"] = "1" if args.cache else "0"
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    from fastapi.testclient import TestClient
+    from benchmarks.datagen import generate
+    from benchmarks.scenarios import SCENARIOS
+    from database import engine, read_engine
+    from main import create_app
+    from manage import migrate
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    migrate()
+    started = time.perf_counter()
+    dataset = generate(engine, args.authors, args.books, args.ratings, seed=args.seed)
+    print(f"generated {dataset} in {time.perf_counter() - started:.1f}s")
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "cache": args.cache,
+            "iterations": args.iterations,
+            "dataset": dataset,
+        },
+        "scenarios": {},
+    }
+    with TestClient(create_app()) as client:
+        client.post("/auth/register", json={"username": "Admin", "email": "admin@example.com", "password": "bench"})
+        token = client.post("/auth/token", data={"username": "Admin", "password": "bench"}).json()["access_token"]
+        ctx = SimpleNamespace(
+            engine=engine, authors=args.authors, books=args.books,
+            bulk_rows=args.bulk_rows, auth={"Authorization": f"Bearer {token}"}
+        )
+        print(f"{'scenario':>20} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'queries':>8} {'errors':>7}")
+        for name in names:
+            iterations = max(1, args.iterations // 10) if name in ("bulk_import", "delete_author") else args.iterations
+            result = run_scenario(client, (engine, read_engine), SCENARIOS[name], ctx, iterations, args.seed)
+            results["scenarios"][name] = result
+            print(f"{name:>20} {result['p50']:>9.2f} {result['p95']:>9.2f} {result['p99']:>9.2f} "
+                  f"{result['throughput_rps']:>9.1f} {result['queries_per_request']:>8.1f} {result['errors']:>7}")
+
+    engine.dispose()
+    read_engine.dispose()
+    tmp.cleanup()
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            compare(results, json.load(baseline))
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import codecs
+import csv
+import io
+import json
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from models import Author, Book, book_author
+from response_cache import bump_catalog_version
+from schemas import AuthorCreate, BookCreate
+
+BOOK_EXPORT_FIELDS = [
+    "id", "isbn", "title", "publication_year", "description",
+    "author_ids", "rating", "rating_count"
+]
+
+def request_format(request: Request):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("", "application/x-ndjson", "application/jsonl", "application/json", "text/plain"):
+        return "ndjson"
+    raise HTTPException(
+        status_code=415,
+        detail="Send NDJSON (application/x-ndjson) or CSV (text/csv)"
+    )
+
+async def iter_lines(request: Request):
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+async def iter_records(request: Request):
+    # Yields (line_number, record, error) without reading the whole body.
+    fmt = request_format(request)
+    line_number = 0
+    header = None
+    pending, pending_start = "", 0
+    async for line in iter_lines(request):
+        line_number += 1
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield line_number, None, f"Invalid JSON: {exc}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "Each line must be a JSON object"
+                continue
+            yield line_number, record, None
+            continue
+
+        # CSV: a quoted field may span lines, so wait for balanced quotes.
+        if not pending:
+            pending_start = line_number
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+        values = next(csv.reader([pending]), [])
+        pending = ""
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [value.strip() for value in values]
+            continue
+        if len(values) != len(header):
+            yield pending_start, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield pending_start, dict(zip(header, values)), None
+    if pending:
+        yield pending_start, None, "Unterminated quoted field"
+
+def parse_author_ids(value):
+    if isinstance(value, str):
+        return [int(part) for part in value.replace(",", ";").split(";") if part.strip()]
+    return value
+
+def _error(line, message):
+    return {"line": line, "error": message}
+
+def _validation_message(exc: ValidationError):
+    return "; ".join(
+        f"{'.'.join(str(p) for p in error['loc'])}: {error['msg']}" for error in exc.errors()
+    )
+
+def import_books(db: Session, rows):
+    errors = []
+    books = {}
+    for line, record in rows:
+        try:
+            record = dict(record)
+            record["author_ids"] = parse_author_ids(record.get("author_ids", []))
+            if record.get("description") == "":
+                record["description"] = None
+            book = BookCreate.model_validate(record)
+        except ValidationError as exc:
+            errors.append(_error(line, _validation_message(exc)))
+            continue
+        except (TypeError, ValueError):
+            errors.append(_error(line, "author_ids must be a list of integers"))
+            continue
+        # Last row wins when a batch repeats an ISBN.
+        books[book.isbn] = (line, book)
+
+    wanted_authors = {author_id for _, book in books.values() for author_id in book.author_ids}
+    known_authors = set(db.scalars(
+        select(Author.id).where(Author.id.in_(wanted_authors))
+    )) if wanted_authors else set()
+    for isbn, (line, book) in list(books.items()):
+        missing = set(book.author_ids) - known_authors
+        if missing:
+            errors.append(_error(line, f"Unknown author ids: {sorted(missing)}"))
+            del books[isbn]
+
+    created = updated = 0
+    if books:
+        isbns = list(books)
+        existing = set(db.scalars(select(Book.isbn).where(Book.isbn.in_(isbns))))
+        stmt = insert(Book)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Book.isbn],
+            set_={
+                "title": stmt.excluded.title,
+                "publication_year": stmt.excluded.publication_year,
+                "description": stmt.excluded.description,
+            }
+        )
+        db.execute(stmt, [
+            {
+                "isbn": book.isbn,
+                "title": book.title,
+                "publication_year": book.publication_year,
+                "description": book.description,
+            }
+            for _, book in books.values()
+        ])
+        ids = dict(db.execute(select(Book.isbn, Book.id).where(Book.isbn.in_(isbns))).all())
+        db.execute(delete(book_author).where(book_author.c.book_id.in_(ids.values())))
+        links = [
+            {"book_id": ids[isbn], "author_id": author_id}
+            for isbn, (_, book) in books.items()
+            for author_id in dict.fromkeys(book.author_ids)
+        ]
+        if links:
+            db.execute(book_author.insert(), links)
+        updated = len(existing)
+        created = len(books) - updated
+    db.commit()
+    return {"created": created, "updated": updated, "errors": errors}
+
+def import_authors(db: Session, rows):
+    errors = []
+    new_authors = []
+    upserts = {}
+    for line, record in rows:
+        try:
+            record = dict(record)
+            if record.get("biography") == "":
+                record["biography"] = None
+            author = AuthorCreate.model_validate(record)
+            author_id = record.get("id")
+            author_id = int(author_id) if author_id not in (None, "") else None
+        except ValidationError as exc:
+            errors.append(_error(line, _validation_message(exc)))
+            continue
+        except (TypeError, ValueError):
+            errors.append(_error(line, "id must be an integer"))
+            continue
+        values = {"name": author.name, "biography": author.biography}
+        if author_id is None:
+            new_authors.append(values)
+        else:
+            upserts[author_id] = dict(values, id=author_id)
+
+    updated = 0
+    if upserts:
+        updated = len(set(db.scalars(select(Author.id).where(Author.id.in_(list(upserts))))))
+        stmt = insert(Author)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Author.id],
+            set_={"name": stmt.excluded.name, "biography": stmt.excluded.biography}
+        )
+        db.execute(stmt, list(upserts.values()))
+    if new_authors:
+        db.execute(insert(Author), new_authors)
+    db.commit()
+    return {
+        "created": len(new_authors) + len(upserts) - updated,
+        "updated": updated,
+        "errors": errors,
+    }
+
+async def run_import(request: Request, session_factory, import_batch, batch_size: int):
+    # Parse on the event loop as the body streams in; each batch is one
+    # transaction on the threadpool.
+    def import_in_session(rows):
+        with session_factory() as db:
+            return import_batch(db, rows)
+
+    report = {"processed": 0, "created": 0, "updated": 0, "errors": []}
+
+    async def flush(rows):
+        result = await run_in_threadpool(import_in_session, rows)
+        bump_catalog_version()
+        report["created"] += result["created"]
+        report["updated"] += result["updated"]
+        report["errors"].extend(result["errors"])
+
+    batch = []
+    async for line, record, error in iter_records(request):
+        report["processed"] += 1
+        if error:
+            report["errors"].append(_error(line, error))
+            continue
+        batch.append((line, record))
+        if len(batch) >= batch_size:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+    report["errors"].sort(key=lambda error: error["line"])
+    return report
+
+def export_books(session_factory, fmt: str, batch_size: int = 1000):
+    columns = [
+        Book.id, Book.isbn, Book.title, Book.publication_year,
+        Book.description, Book.rating, Book.rating_count
+    ]
+    with session_factory() as db:
+        result = db.execute(
+            select(*columns).order_by(Book.id).execution_options(yield_per=batch_size)
+        )
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=BOOK_EXPORT_FIELDS)
+            writer.writeheader()
+            yield buffer.getvalue()
+        for partition in result.partitions():
+            book_ids = [row.id for row in partition]
+            author_ids = {}
+            for book_id, author_id in db.execute(
+                select(book_author.c.book_id, book_author.c.author_id)
+                .where(book_author.c.book_id.in_(book_ids))
+                .order_by(book_author.c.book_id, book_author.c.author_id)
+            ):
+                author_ids.setdefault(book_id, []).append(author_id)
+            rows = [
+                dict(row._mapping, author_ids=author_ids.get(row.id, []))
+                for row in partition
+            ]
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=BOOK_EXPORT_FIELDS)
+                for row in rows:
+                    writer.writerow(dict(row, author_ids=";".join(map(str, row["author_ids"]))))
+                yield buffer.getvalue()
+            else:
+                yield "".join(json.dumps(row) + "\n" for row in rows)
@@ -0,0 +1,108 @@
+import os
+
+def env_flag(name, default=False):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+def env_str(name, default):
+    return os.getenv(name) or default
+
+DATABASE_URL = env_str("DATABASE_URL", "sqlite:///./book_catalog.db")
+# Schema changes are applied by `python manage.py migrate` at deploy time.
+# Turn this on to also run create_all (plus the FTS DDL) on every start,
+# which is handy for a throwaway local database.
+CREATE_SCHEMA_ON_STARTUP = env_flag("CREATE_SCHEMA_ON_STARTUP")
+
+# Serve the read endpoints, login and rating from async handlers on an
+# aiosqlite engine instead of the threadpool.
+USE_ASYNC_DB = env_flag("USE_ASYNC_DB")
+
+# bcrypt work factor for new hashes; existing hashes keep their own cost.
+BCRYPT_ROUNDS = env_int("BCRYPT_ROUNDS", 12)
+# Dedicated bcrypt threads, and how many calls may wait for them before
+# new logins are refused with 503.
+PASSWORD_HASH_WORKERS = env_int("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1))
+PASSWORD_HASH_MAX_PENDING = env_int("PASSWORD_HASH_MAX_PENDING", PASSWORD_HASH_WORKERS * 8)
+
+# Authenticated users are cached per process for this many seconds, which
+# bounds how long another worker may still accept a deleted user's token.
+USER_CACHE_TTL = env_int("USER_CACHE_TTL", 60)
+USER_CACHE_SIZE = env_int("USER_CACHE_SIZE", 10000)
+
+# Connection pools. The write pool plus overflow matches the default request
+# threadpool (40 threads); reads get their own pool so they never queue
+# behind writers.
+DB_POOL_SIZE = env_int("DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = env_int("DB_MAX_OVERFLOW", 30)
+DB_READ_POOL_SIZE = env_int("DB_READ_POOL_SIZE", 10)
+DB_READ_MAX_OVERFLOW = env_int("DB_READ_MAX_OVERFLOW", 30)
+
+# SQLite pragmas applied to every new connection.
+SQLITE_JOURNAL_MODE = env_str("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = env_str("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+SQLITE_CACHE_SIZE_KB = env_int("SQLITE_CACHE_SIZE_KB", 64000)
+SQLITE_MMAP_SIZE = env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+
+# Public catalog GETs are cached in process, keyed by a catalog version that
+# every write bumps. The version lives in memory unless CATALOG_VERSION_FILE
+# is set; serve.py sets it so every worker on the box sees every write.
+CATALOG_VERSION_FILE = env_str("CATALOG_VERSION_FILE", "")
+RESPONSE_CACHE_ENABLED = env_flag("RESPONSE_CACHE_ENABLED", True)
+RESPONSE_CACHE_TTL = env_int("RESPONSE_CACHE_TTL", 30)
+RESPONSE_CACHE_SIZE = env_int("RESPONSE_CACHE_SIZE", 1024)
+# Browsers may reuse a response this long before revalidating with the ETag.
+RESPONSE_CACHE_MAX_AGE = env_int("RESPONSE_CACHE_MAX_AGE", 0)
+
+# Build the hot read responses (book and author lists, detail and search)
+# from column tuples and encode them with orjson, skipping per-object
+# Pydantic validation. The JSON is the same either way.
+FAST_JSON_RESPONSES = env_flag("FAST_JSON_RESPONSES")
+
+# serve.py: the multi-worker production launcher.
+WEB_HOST = env_str("WEB_HOST", "0.0.0.0")
+WEB_PORT = env_int("WEB_PORT", 8000)
+WEB_WORKERS = env_int("WEB_WORKERS", os.cpu_count() or 1)
+WEB_KEEPALIVE = env_int("WEB_KEEPALIVE", 5)
+WEB_BACKLOG = env_int("WEB_BACKLOG", 2048)
+# Open connections per worker before new ones get 503; 0 means no limit.
+WEB_LIMIT_CONCURRENCY = env_int("WEB_LIMIT_CONCURRENCY", 0)
+# Seconds a worker may spend finishing requests on shutdown or reload.
+WEB_GRACEFUL_TIMEOUT = env_int("WEB_GRACEFUL_TIMEOUT", 30)
+# Replace a worker after this many requests; 0 means never.
+WEB_MAX_REQUESTS = env_int("WEB_MAX_REQUESTS", 0)
+
+# Request metrics (/metrics, Server-Timing) and logging.
+METRICS_ENABLED = env_flag("METRICS_ENABLED", True)
+LOG_LEVEL = env_str("LOG_LEVEL", "INFO")
+# Requests at least this slow, or running at least this many SQL statements
+# (an N+1 sign), are always logged as warnings.
+SLOW_REQUEST_MS = env_int("SLOW_REQUEST_MS", 500)
+QUERY_COUNT_WARNING = env_int("QUERY_COUNT_WARNING", 20)
+# Share of the remaining requests logged at INFO, e.g. 0.01 for 1%.
+REQUEST_LOG_SAMPLE_RATE = float(env_str("REQUEST_LOG_SAMPLE_RATE", "0"))
+
+# GET /books/top ranks by a Bayesian average: ratings are pulled towards
+# LEADERBOARD_PRIOR_MEAN until a book has about LEADERBOARD_MIN_VOTES of them.
+LEADERBOARD_MIN_VOTES = env_int("LEADERBOARD_MIN_VOTES", 10)
+LEADERBOARD_PRIOR_MEAN = float(env_str("LEADERBOARD_PRIOR_MEAN", "3.0"))
+
+# Most ratings accepted by one POST /books/ratings:batch request.
+RATING_BATCH_MAX_SIZE = env_int("RATING_BATCH_MAX_SIZE", 1000)
+
+# Write-behind ratings: POST /books/{id}/rate queues the rating, answers 202
+# and a background writer commits queued ratings in groups. Ratings still in
+# the queue are lost if the process is killed without a clean shutdown.
+RATING_WRITE_BEHIND = env_flag("RATING_WRITE_BEHIND")
+# Queued ratings beyond this are refused with 503.
+RATING_QUEUE_SIZE = env_int("RATING_QUEUE_SIZE", 10000)
+# A group commit happens when this many ratings are waiting or this many
+# milliseconds after the first one arrived, whichever is first.
+RATING_FLUSH_MAX_BATCH = env_int("RATING_FLUSH_MAX_BATCH", 500)
+RATING_FLUSH_INTERVAL_MS = env_int("RATING_FLUSH_INTERVAL_MS", 5)
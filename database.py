@@ -1,19 +1,109 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import config
+from metrics import instrument_engine
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./book_catalog.db"
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def sqlite_pragmas(read_only=False):
+    pragmas = {
+        "journal_mode": config.SQLITE_JOURNAL_MODE,
+        "synchronous": config.SQLITE_SYNCHRONOUS,
+        "busy_timeout": config.SQLITE_BUSY_TIMEOUT_MS,
+        # Negative cache_size is in KiB rather than pages.
+        "cache_size": -config.SQLITE_CACHE_SIZE_KB,
+        "mmap_size": config.SQLITE_MMAP_SIZE,
+        "temp_store": "MEMORY",
+    }
+    if read_only:
+        pragmas["query_only"] = "ON"
+    return pragmas
+
+def set_sqlite_pragmas(engine, read_only=False):
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def create_db_engine(url=SQLALCHEMY_DATABASE_URL, read_only=False,
+                     pool_size=config.DB_POOL_SIZE, max_overflow=config.DB_MAX_OVERFLOW):
+    kwargs = {}
+    if url.startswith("sqlite"):
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if ":memory:" not in url:
+        kwargs.update(pool_size=pool_size, max_overflow=max_overflow)
+    db_engine = create_engine(url, **kwargs)
+    if db_engine.dialect.name == "sqlite":
+        set_sqlite_pragmas(db_engine, read_only)
+    instrument_engine(db_engine)
+    return db_engine
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Separate pool for GET handlers: WAL lets them read while a write is in
+# progress, and they never wait for a connection a writer is holding.
+read_engine = create_db_engine(
+    read_only=True,
+    pool_size=config.DB_READ_POOL_SIZE,
+    max_overflow=config.DB_READ_MAX_OVERFLOW
+)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+def reset_pools_after_fork():
+    # A forked worker must never reuse a SQLite connection opened by its
+    # parent; drop the inherited ones (without closing them under the parent)
+    # so each process connects, and runs the pragmas, on its own.
+    engine.dispose(close=False)
+    read_engine.dispose(close=False)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_pools_after_fork)
+
 Base = declarative_base()
 
+def init_db(bind=None):
+    # Importing models registers every table (and the FTS hook) on Base.
+    import models
+    Base.metadata.create_all(bind=bind or engine)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+_async_session_factory = None
+
+def get_async_session_factory():
+    # Created on first use so aiosqlite is only needed when async mode is on.
+    global _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        async_engine = create_async_engine(ASYNC_DATABASE_URL)
+        set_sqlite_pragmas(async_engine.sync_engine)
+        instrument_engine(async_engine.sync_engine)
+        _async_session_factory = async_sessionmaker(
+            async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory
+
+async def get_async_db():
+    async with get_async_session_factory()() as db:
+        yield db
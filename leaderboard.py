@@ -0,0 +1,27 @@
+from sqlalchemy import case, column, table, update
+import config
+
+# Bayesian average: every book starts with MIN_VOTES imaginary ratings of
+# PRIOR_MEAN, so a single 5-star vote cannot outrank a hundred 4.8s. Books
+# without ratings score NULL and stay off the leaderboard. The score lives in
+# books.score and is kept current by the rating UPDATE itself, so top-K is a
+# walk down ix_books_score (or ix_books_publication_year_score) that stops
+# after K rows. After changing either setting, rescore existing books with
+# `python manage.py rebuild-ratings`.
+def score_expression(rating_sum, rating_count):
+    prior_votes = config.LEADERBOARD_MIN_VOTES
+    return case(
+        (
+            rating_count > 0,
+            (rating_sum + config.LEADERBOARD_PRIOR_MEAN * prior_votes) / (rating_count + prior_votes)
+        ),
+        else_=None
+    )
+
+# Lightweight table so migrations can use this without importing the models.
+books = table("books", column("rating_sum"), column("rating_count"), column("score"))
+
+def rebuild_scores(conn):
+    return conn.execute(
+        update(books).values(score=score_expression(books.c.rating_sum, books.c.rating_count))
+    ).rowcount
@@ -4,31 +4,77 @@ from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 from fastapi import Request
 from fastapi.middleware.cors import CORSMiddleware
-from routers import auth, books, authors
+from routers import auth, books, authors, async_auth, async_books, async_authors, metrics
+from pagination import NEXT_CURSOR_HEADER
+from database import init_db
+from cache import TTLCache
+from response_cache import ResponseCacheMiddleware
+from metrics import MetricsMiddleware
+from ratings import rating_queue
+from contextlib import asynccontextmanager
+import logging
 import os
+import config
 
-app = FastAPI(title="Book Catalog Management System")
+logging.basicConfig(level=config.LOG_LEVEL)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.CREATE_SCHEMA_ON_STARTUP:
+        init_db()
+    if config.RATING_WRITE_BEHIND:
+        rating_queue.start()
+    yield
+    # Commit queued ratings before the worker exits.
+    rating_queue.stop()
 
-app.include_router(auth.router)
-app.include_router(books.router)
-app.include_router(authors.router)
+def create_app(use_async_db: bool = config.USE_ASYNC_DB, response_cache=None):
+    app = FastAPI(title="Book Catalog Management System", lifespan=lifespan)
 
-if os.path.isdir("static"):
-    app.mount("/static", StaticFiles(directory="static"), name="static")
+    if response_cache is None and config.RESPONSE_CACHE_ENABLED:
+        response_cache = TTLCache(config.RESPONSE_CACHE_SIZE, config.RESPONSE_CACHE_TTL)
+    if response_cache is not None:
+        # Added before CORS so cached responses still get CORS headers.
+        app.add_middleware(
+            ResponseCacheMiddleware,
+            backend=response_cache,
+            max_age=config.RESPONSE_CACHE_MAX_AGE
+        )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Server-Timing"],
+    )
+    if config.METRICS_ENABLED:
+        # Outermost, so response cache hits are timed and counted too.
+        app.add_middleware(MetricsMiddleware)
+
+    if use_async_db:
+        # Registered first so they win; everything else falls through.
+        app.include_router(async_auth.router)
+        app.include_router(async_books.router)
+        app.include_router(async_authors.router)
+    app.include_router(auth.router)
+    app.include_router(books.router)
+    app.include_router(authors.router)
+    if config.METRICS_ENABLED:
+        app.include_router(metrics.router)
+
+    if os.path.isdir("static"):
+        app.mount("/static", StaticFiles(directory="static"), name="static")
+
+    @app.get("/", response_class=HTMLResponse)
+    async def read_root(request: Request):
+        return templates.TemplateResponse("index.html", {"request": request})
+
+    return app
 
 templates = Jinja2Templates(directory="templates")
 
-@app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+app = create_app()
 
 if __name__ == "__main__":
     import uvicorn
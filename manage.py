@@ -0,0 +1,141 @@
+import argparse
+import os
+from sqlalchemy import inspect, text
+from database import Base, engine, init_db
+from models import UserRating, book_author
+from search import create_search_tables, rebuild_search_tables
+from leaderboard import rebuild_scores
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_REVISION = "0001"
+
+RATING_COLUMNS = {
+    "rating_sum": "FLOAT DEFAULT 0.0",
+    "rating_count": "INTEGER DEFAULT 0",
+    "score": "FLOAT",
+}
+
+def ensure_rating_columns(conn):
+    existing = {column["name"] for column in inspect(conn).get_columns("books")}
+    for name, ddl in RATING_COLUMNS.items():
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE books ADD COLUMN {name} {ddl}"))
+
+def rebuild_ratings(conn):
+    ensure_rating_columns(conn)
+    result = conn.execute(text("""
+        UPDATE books SET
+            rating_sum = COALESCE(
+                (SELECT SUM(rating) FROM user_ratings WHERE book_id = books.id), 0.0),
+            rating_count = (SELECT COUNT(*) FROM user_ratings WHERE book_id = books.id),
+            rating = COALESCE(
+                ROUND((SELECT AVG(rating) FROM user_ratings WHERE book_id = books.id), 2), 0.0)
+    """))
+    rebuild_scores(conn)
+    return result.rowcount
+
+def upgrade_book_author(conn):
+    # SQLite cannot add a primary key in place: copy into a new table,
+    # dropping duplicate and half-empty links on the way.
+    if inspect(conn).get_pk_constraint("book_author")["constrained_columns"]:
+        return
+    conn.execute(text("ALTER TABLE book_author RENAME TO book_author_old"))
+    book_author.create(conn)
+    conn.execute(text("""
+        INSERT OR IGNORE INTO book_author (book_id, author_id)
+        SELECT book_id, author_id FROM book_author_old
+        WHERE book_id IS NOT NULL AND author_id IS NOT NULL
+    """))
+    conn.execute(text("DROP TABLE book_author_old"))
+
+def upgrade_user_ratings(conn):
+    # Keep each user's latest rating of a book so the unique index can be built.
+    conn.execute(text("""
+        DELETE FROM user_ratings
+        WHERE user_id IS NOT NULL AND id NOT IN (
+            SELECT MAX(id) FROM user_ratings
+            WHERE user_id IS NOT NULL
+            GROUP BY user_id, book_id
+        )
+    """))
+    for index in UserRating.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+def upgrade_schema(conn):
+    # Brings a database created by an older version up to the current models.
+    # Safe to run repeatedly.
+    upgrade_book_author(conn)
+    upgrade_user_ratings(conn)
+    return rebuild_ratings(conn)
+
+def alembic_config():
+    from alembic.config import Config
+    alembic_cfg = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", os.path.join(BASE_DIR, "migrations"))
+    return alembic_cfg
+
+def adopt_existing_database(conn):
+    # A database made by create_all (or an older release) has tables but no
+    # alembic_version: bring it to the baseline schema, then stamp it.
+    upgrade_schema(conn)
+    Base.metadata.create_all(bind=conn)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    create_search_tables(None, conn)
+
+def migrate(revision="head", bind=None):
+    from alembic import command
+    alembic_cfg = alembic_config()
+    with (bind or engine).begin() as conn:
+        alembic_cfg.attributes["connection"] = conn
+        db_inspector = inspect(conn)
+        if not db_inspector.has_table("alembic_version") and db_inspector.has_table("books"):
+            adopt_existing_database(conn)
+            command.stamp(alembic_cfg, BASELINE_REVISION)
+        command.upgrade(alembic_cfg, revision)
+        return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Book catalog maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("init-db", help="Create missing tables and search indexes")
+    migrate_parser = commands.add_parser(
+        "migrate",
+        help="Apply schema migrations; run once per deploy before starting the app"
+    )
+    migrate_parser.add_argument("revision", nargs="?", default="head")
+    commands.add_parser(
+        "rebuild-ratings",
+        help="Recompute books.rating_sum/rating_count/rating/score from user_ratings"
+    )
+    commands.add_parser(
+        "upgrade-schema",
+        help="Add the book_author primary key and user_ratings indexes to an existing database"
+    )
+    commands.add_parser(
+        "rebuild-search",
+        help="Re-index books_fts/authors_fts from the books and authors tables"
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "init-db":
+        init_db()
+        print("Database schema is up to date")
+    elif args.command == "migrate":
+        print(f"Database is at revision {migrate(args.revision)}")
+    elif args.command == "rebuild-ratings":
+        with engine.begin() as conn:
+            count = rebuild_ratings(conn)
+        print(f"Rebuilt rating counters for {count} books")
+    elif args.command == "upgrade-schema":
+        with engine.begin() as conn:
+            count = upgrade_schema(conn)
+        print(f"Schema upgraded, rating counters rebuilt for {count} books")
+    elif args.command == "rebuild-search":
+        with engine.begin() as conn:
+            rebuild_search_tables(conn)
+        print("Rebuilt full-text search indexes")
+
+if __name__ == "__main__":
+    main()
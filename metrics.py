@@ -0,0 +1,180 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+from sqlalchemy import event
+import config
+
+logger = logging.getLogger("book_catalog.requests")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BATCH_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Per-request SQL stats. The middleware puts a fresh dict here; threadpool
+# handlers and run_sync inherit the context, so the engine hooks below add
+# to the same dict whichever thread runs the query.
+request_stats = contextvars.ContextVar("request_stats", default=None)
+
+def _label_text(names, values):
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return ",".join(pairs)
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{{{_label_text(self.labels, label_values)}}} {value:g}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                labels = _label_text(self.labels, label_values)
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {bucket_count}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f"{self.name}_sum{{{labels}}} {total:g}")
+                lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+http_requests = Counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+http_latency = Histogram(
+    "http_request_duration_seconds", "Time to the end of the response body.",
+    ("method", "route"), LATENCY_BUCKETS
+)
+db_queries = Histogram(
+    "db_queries_per_request", "SQL statements executed per request.", ("method", "route"), QUERY_BUCKETS
+)
+db_time = Counter(
+    "db_query_seconds_total", "Time spent executing SQL, by route.", ("method", "route")
+)
+write_batch_size = Histogram(
+    "write_queue_batch_size", "Items written per group commit.", ("queue",), BATCH_BUCKETS
+)
+write_lag = Histogram(
+    "write_queue_lag_seconds", "Time from enqueue to commit.", ("queue",), LATENCY_BUCKETS
+)
+
+def render_metrics(extra_lines=()):
+    lines = []
+    for metric in (http_requests, http_latency, db_queries, db_time, write_batch_size, write_lag):
+        lines.extend(metric.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
+
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if request_stats.get() is not None:
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = request_stats.get()
+        started = conn.info.get("query_started")
+        if stats is None or not started:
+            return
+        stats["queries"] += 1
+        stats["db_seconds"] += time.perf_counter() - started.pop()
+
+def route_label(scope):
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if scope.get("response_cache") == "hit":
+        return "response_cache"
+    return "unmatched"
+
+# Outermost ASGI middleware: times every request, including response cache
+# hits, adds a Server-Timing header and feeds the metrics above.
+class MetricsMiddleware:
+    def __init__(self, app, slow_request_ms=None, query_warning=None, sample_rate=None):
+        self.app = app
+        self.slow_request_ms = config.SLOW_REQUEST_MS if slow_request_ms is None else slow_request_ms
+        self.query_warning = config.QUERY_COUNT_WARNING if query_warning is None else query_warning
+        self.sample_rate = config.REQUEST_LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = {"queries": 0, "db_seconds": 0.0}
+        token = request_stats.set(stats)
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                app_ms = (time.perf_counter() - started) * 1000
+                timing = (
+                    f'app;dur={app_ms:.1f}, '
+                    f'db;dur={stats["db_seconds"] * 1000:.1f};desc="{stats["queries"]} queries"'
+                )
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode())
+                ])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_stats.reset(token)
+            self.record(scope, status[0], time.perf_counter() - started, stats)
+
+    def record(self, scope, status, elapsed, stats):
+        labels = (scope["method"], route_label(scope))
+        http_requests.inc(labels + (str(status),))
+        http_latency.observe(labels, elapsed)
+        db_queries.observe(labels, stats["queries"])
+        db_time.inc(labels, stats["db_seconds"])
+
+        elapsed_ms = elapsed * 1000
+        args = (scope["method"], scope["path"], status, elapsed_ms, stats["queries"], stats["db_seconds"] * 1000)
+        if elapsed_ms >= self.slow_request_ms:
+            logger.warning("Slow request %s %s -> %s in %.1f ms (%d queries, %.1f ms in SQL)", *args)
+        elif stats["queries"] >= self.query_warning:
+            logger.warning("Many queries %s %s -> %s in %.1f ms (%d queries, %.1f ms in SQL)", *args)
+        elif self.sample_rate and random.random() < self.sample_rate:
+            logger.info("%s %s -> %s in %.1f ms (%d queries, %.1f ms in SQL)", *args)
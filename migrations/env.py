@@ -0,0 +1,43 @@
+from alembic import context
+from sqlalchemy import create_engine
+import config
+from database import Base
+from migrations.helpers import include_object
+import models
+
+target_metadata = Base.metadata
+
+def configure(**kwargs):
+    context.configure(
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite can only ALTER through table copies.
+        render_as_batch=True,
+        **kwargs
+    )
+
+def run_migrations_offline():
+    configure(url=config.DATABASE_URL, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    # manage.migrate passes its own connection so adoption and upgrade share
+    # one transaction.
+    connection = context.config.attributes.get("connection")
+    if connection is not None:
+        configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+    engine = create_engine(config.DATABASE_URL)
+    with engine.connect() as connection:
+        configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+    engine.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
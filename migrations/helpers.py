@@ -0,0 +1,13 @@
+from alembic import op
+
+# FTS5 tables and their shadow tables are created by search.py, not models.
+def include_object(obj, name, type_, reflected, compare_to):
+    if type_ == "table" and reflected and compare_to is None:
+        return "_fts" not in name
+    return True
+
+def create_index(name, table, columns, unique=False):
+    # Safe to re-run, e.g. on a database that manage.migrate adopted with its
+    # indexes already in place. SQLite has no online index build, so each
+    # index is a single CREATE INDEX statement holding the write lock.
+    op.create_index(name, table, columns, unique=unique, if_not_exists=True)
@@ -0,0 +1,111 @@
+"""Baseline: the schema as of the rating upsert and association keys.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from migrations.helpers import create_index
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Full-text search as search.py defined it at this revision: external-content
+# FTS5 tables kept in sync by triggers. Spelled out so later changes to
+# search.py cannot change what this revision does.
+SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE books_fts USING fts5("
+    "title, description, isbn, publication_year, "
+    "content='books', content_rowid='id', tokenize='unicode61')",
+    "CREATE TRIGGER books_fts_ai AFTER INSERT ON books BEGIN "
+    "INSERT INTO books_fts(rowid, title, description, isbn, publication_year) "
+    "VALUES (new.id, new.title, new.description, new.isbn, new.publication_year); END",
+    "CREATE TRIGGER books_fts_ad AFTER DELETE ON books BEGIN "
+    "INSERT INTO books_fts(books_fts, rowid, title, description, isbn, publication_year) "
+    "VALUES ('delete', old.id, old.title, old.description, old.isbn, old.publication_year); END",
+    "CREATE TRIGGER books_fts_au AFTER UPDATE OF title, description, isbn, publication_year ON books BEGIN "
+    "INSERT INTO books_fts(books_fts, rowid, title, description, isbn, publication_year) "
+    "VALUES ('delete', old.id, old.title, old.description, old.isbn, old.publication_year); "
+    "INSERT INTO books_fts(rowid, title, description, isbn, publication_year) "
+    "VALUES (new.id, new.title, new.description, new.isbn, new.publication_year); END",
+    "CREATE VIRTUAL TABLE authors_fts USING fts5("
+    "name, biography, content='authors', content_rowid='id', tokenize='unicode61')",
+    "CREATE TRIGGER authors_fts_ai AFTER INSERT ON authors BEGIN "
+    "INSERT INTO authors_fts(rowid, name, biography) VALUES (new.id, new.name, new.biography); END",
+    "CREATE TRIGGER authors_fts_ad AFTER DELETE ON authors BEGIN "
+    "INSERT INTO authors_fts(authors_fts, rowid, name, biography) "
+    "VALUES ('delete', old.id, old.name, old.biography); END",
+    "CREATE TRIGGER authors_fts_au AFTER UPDATE OF name, biography ON authors BEGIN "
+    "INSERT INTO authors_fts(authors_fts, rowid, name, biography) "
+    "VALUES ('delete', old.id, old.name, old.biography); "
+    "INSERT INTO authors_fts(rowid, name, biography) VALUES (new.id, new.name, new.biography); END",
+]
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String()),
+        sa.Column("email", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+        sa.Column("is_active", sa.Integer()),
+    )
+    create_index("ix_users_id", "users", ["id"])
+    create_index("ix_users_username", "users", ["username"], unique=True)
+    create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "books",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String()),
+        sa.Column("isbn", sa.String()),
+        sa.Column("publication_year", sa.Integer()),
+        sa.Column("rating", sa.Float()),
+        sa.Column("rating_sum", sa.Float()),
+        sa.Column("rating_count", sa.Integer()),
+        sa.Column("description", sa.String()),
+    )
+    create_index("ix_books_id", "books", ["id"])
+    create_index("ix_books_title", "books", ["title"])
+    create_index("ix_books_isbn", "books", ["isbn"], unique=True)
+
+    op.create_table(
+        "authors",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("biography", sa.String()),
+    )
+    create_index("ix_authors_id", "authors", ["id"])
+    create_index("ix_authors_name", "authors", ["name"])
+
+    op.create_table(
+        "book_author",
+        sa.Column("book_id", sa.Integer(), sa.ForeignKey("books.id"), primary_key=True),
+        sa.Column("author_id", sa.Integer(), sa.ForeignKey("authors.id"), primary_key=True),
+    )
+    create_index("ix_book_author_author_id", "book_author", ["author_id"])
+
+    op.create_table(
+        "user_ratings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("book_id", sa.Integer(), sa.ForeignKey("books.id")),
+        sa.Column("rating", sa.Float()),
+    )
+    create_index("ix_user_ratings_id", "user_ratings", ["id"])
+    create_index("ix_user_ratings_book_id", "user_ratings", ["book_id"])
+    create_index(
+        "ix_user_ratings_user_id_book_id", "user_ratings", ["user_id", "book_id"], unique=True
+    )
+
+    for statement in SEARCH_DDL:
+        op.execute(statement)
+
+def downgrade():
+    for name in ("books_fts", "authors_fts"):
+        op.execute(f"DROP TABLE IF EXISTS {name}")
+    for table in ("user_ratings", "book_author", "authors", "books", "users"):
+        op.drop_table(table)
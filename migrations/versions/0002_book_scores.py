@@ -0,0 +1,39 @@
+"""Leaderboard: books.score and the indexes behind GET /books/top.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from migrations.helpers import create_index
+import config
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Databases adopted by manage.migrate may already have the column.
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("books")}
+    if "score" not in columns:
+        op.add_column("books", sa.Column("score", sa.Float()))
+    # The Bayesian average as leaderboard.py defined it at this revision,
+    # with the deployment's current prior.
+    op.get_bind().execute(
+        sa.text(
+            "UPDATE books SET score = CASE WHEN rating_count > 0 "
+            "THEN (rating_sum + :prior_mean * :prior_votes) / (rating_count + :prior_votes) "
+            "END"
+        ),
+        {"prior_mean": config.LEADERBOARD_PRIOR_MEAN, "prior_votes": config.LEADERBOARD_MIN_VOTES}
+    )
+    create_index("ix_books_score", "books", ["score", "id"])
+    create_index("ix_books_publication_year_score", "books", ["publication_year", "score", "id"])
+
+def downgrade():
+    op.drop_index("ix_books_publication_year_score", table_name="books")
+    op.drop_index("ix_books_score", table_name="books")
+    with op.batch_alter_table("books") as batch_op:
+        batch_op.drop_column("score")
@@ -0,0 +1,21 @@
+"""Indexes for the year and rating orders and filters of GET /books/.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+from migrations.helpers import create_index
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    create_index("ix_books_publication_year", "books", ["publication_year", "id"])
+    create_index("ix_books_rating", "books", ["rating", "id"])
+
+def downgrade():
+    op.drop_index("ix_books_rating", table_name="books")
+    op.drop_index("ix_books_publication_year", table_name="books")
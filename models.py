@@ -1,13 +1,13 @@
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, Float, Table
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import event, Column, Integer, String, ForeignKey, Float, Table, Index
 from sqlalchemy.orm import relationship
-
-Base = declarative_base()
+from database import Base
+from search import create_search_tables
 
 book_author = Table('book_author',
     Base.metadata,
-    Column('book_id', Integer, ForeignKey('books.id')),
-    Column('author_id', Integer, ForeignKey('authors.id'))
+    Column('book_id', Integer, ForeignKey('books.id'), primary_key=True),
+    # The primary key covers lookups by book; this one covers "books by author".
+    Column('author_id', Integer, ForeignKey('authors.id'), primary_key=True, index=True)
 )
 
 class User(Base):
@@ -22,13 +22,25 @@ class User(Base):
 
 class Book(Base):
     __tablename__ = "books"
+    # Leaderboard order, overall and per year (see leaderboard.py), and the
+    # year and rating orders of GET /books/, which carry id as the cursor
+    # tie-breaker.
+    __table_args__ = (
+        Index("ix_books_score", "score", "id"),
+        Index("ix_books_publication_year_score", "publication_year", "score", "id"),
+        Index("ix_books_publication_year", "publication_year", "id"),
+        Index("ix_books_rating", "rating", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     isbn = Column(String, unique=True, index=True)
     publication_year = Column(Integer)
     rating = Column(Float, default=0.0)
+    rating_sum = Column(Float, default=0.0)
+    rating_count = Column(Integer, default=0)
+    score = Column(Float)
     description = Column(String)
-    authors = relationship("Author", secondary=book_author, back_populates="books", lazy="joined")
+    authors = relationship("Author", secondary=book_author, back_populates="books")
     user_ratings = relationship("UserRating", back_populates="book")
 
 class Author(Base):
@@ -36,16 +48,19 @@ class Author(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     biography = Column(String)
-    books = relationship("Book", secondary=book_author, back_populates="authors", lazy="joined")
+    books = relationship("Book", secondary=book_author, back_populates="authors")
 
 class UserRating(Base):
     __tablename__ = "user_ratings"
+    # One rating per user and book; the target of the rating upsert.
+    __table_args__ = (
+        Index("ix_user_ratings_user_id_book_id", "user_id", "book_id", unique=True),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    book_id = Column(Integer, ForeignKey("books.id"))
+    book_id = Column(Integer, ForeignKey("books.id"), index=True)
     rating = Column(Float)
     user = relationship("User", back_populates="ratings")
     book = relationship("Book", back_populates="user_ratings")
 
-engine = create_engine('sqlite:///./book_catalog.db')
-Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+event.listen(Base.metadata, "after_create", create_search_tables)
\ No newline at end of file
@@ -0,0 +1,68 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+from fastapi import HTTPException
+from sqlalchemy import literal, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Largest page a listing serves; bigger exports go through /books/export.
+MAX_PAGE_SIZE = 1000
+
+# Columns of a sort must end with the primary key so the key is unique.
+SortKey = namedtuple("SortKey", ["columns", "descending"])
+
+def encode_cursor(sort: str, values):
+    payload = json.dumps({"s": sort, "k": list(values)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["k"]
+        cursor_sort = payload["s"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+    return values
+
+def get_sort_key(sorts: dict, sort: str):
+    if sort not in sorts:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported sort '{sort}', expected one of: {', '.join(sorts)}"
+        )
+    return sorts[sort]
+
+def fetch_page(db, model, sorts: dict, sort: str, limit: int, cursor=None, skip: int = 0,
+               filters=(), options=(), load_columns=None):
+    sort_key = get_sort_key(sorts, sort)
+    columns = sort_key.columns
+    order = [column.desc() if sort_key.descending else column for column in columns]
+
+    # Pick the page's primary keys first so LIMIT counts entities, not the
+    # rows an eager load would fan out to; then load just those entities.
+    page = db.query(model.id).filter(*filters).order_by(*order)
+    if cursor is not None:
+        values = decode_cursor(cursor, sort)
+        if len(values) != len(columns):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        key = tuple_(*columns)
+        bound = tuple_(*[literal(value) for value in values])
+        page = page.filter(key < bound if sort_key.descending else key > bound)
+    elif skip:
+        page = page.offset(skip)
+    page = page.limit(limit).subquery()
+
+    # With load_columns, rows are plain tuples and nothing is hydrated; they must
+    # include the sort columns for the next cursor.
+    query = db.query(*load_columns) if load_columns else db.query(model).options(*options)
+    items = query.join(page, model.id == page.c.id).order_by(*order).all()
+
+    next_cursor = None
+    if items and len(items) == limit:
+        last = items[-1]
+        next_cursor = encode_cursor(sort, [getattr(last, column.key) for column in columns])
+    return items, next_cursor
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+
+# Runs bcrypt on a small dedicated pool instead of the caller's thread. At
+# most max_pending hash/verify calls may be queued or running; beyond that
+# callers get a 503 straight away rather than piling up behind bcrypt and
+# starving the request threadpool or the event loop.
+class PasswordHasher:
+    def __init__(self, context, max_workers: int, max_pending: int):
+        self.context = context
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._seconds_total = 0.0
+        self._seconds_max = 0.0
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent authentication requests, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            self._queued += 1
+
+    def _timed(self, fn, *args):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._seconds_total += elapsed
+                self._seconds_max = max(self._seconds_max, elapsed)
+            self._slots.release()
+
+    def _submit(self, fn, *args):
+        self._acquire()
+        try:
+            return self._executor.submit(self._timed, fn, *args)
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            self._slots.release()
+            raise
+
+    def verify_sync(self, plain_password, hashed_password):
+        return self._submit(self.context.verify, plain_password, hashed_password).result()
+
+    def hash_sync(self, password):
+        return self._submit(self.context.hash, password).result()
+
+    async def verify(self, plain_password, hashed_password):
+        future = self._submit(self.context.verify, plain_password, hashed_password)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password):
+        return await asyncio.wrap_future(self._submit(self.context.hash, password))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "queue_depth": self._queued,
+                "in_flight": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "seconds_total": self._seconds_total,
+                "seconds_max": self._seconds_max,
+            }
@@ -0,0 +1,99 @@
+from sqlalchemy import bindparam, case, delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from leaderboard import score_expression
+from models import Book, User, UserRating
+from response_cache import bump_catalog_version
+from write_queue import WriteBehindQueue
+import config
+
+def rating_delta_values(delta_sum, delta_count):
+    # SET clause of the counter UPDATE; the right-hand side sees the
+    # pre-update values.
+    new_sum = Book.rating_sum + delta_sum
+    new_count = Book.rating_count + delta_count
+    return {
+        Book.rating_sum: new_sum,
+        Book.rating_count: new_count,
+        Book.rating: case(
+            (new_count > 0, func.round(new_sum / new_count, 2)),
+            else_=0.0
+        ),
+        Book.score: score_expression(new_sum, new_count)
+    }
+
+def apply_rating_delta(db: Session, book_id: int, delta_sum: float, delta_count: int):
+    # Single atomic UPDATE.
+    db.query(Book).filter(Book.id == book_id).update(
+        rating_delta_values(delta_sum, delta_count), synchronize_session=False
+    )
+
+def previous_rating(user_id, book_id):
+    return select(UserRating.rating).where(
+        UserRating.user_id == user_id,
+        UserRating.book_id == book_id
+    ).scalar_subquery()
+
+def upsert_ratings(db: Session, rows):
+    stmt = insert(UserRating).values(rows)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserRating.user_id, UserRating.book_id],
+        set_={"rating": stmt.excluded.rating}
+    ))
+
+def write_ratings(db: Session, rows):
+    # Same order as save_rating, batched: one executemany UPDATE of the
+    # counters (one row per user and book), one multi-row upsert, one commit.
+    # Later rows for the same user and book replace earlier ones.
+    rows = list({(row["user_id"], row["book_id"]): row for row in rows}.values())
+    previous = previous_rating(bindparam("voter_id"), bindparam("target_id"))
+    new_rating = bindparam("new_rating")
+    db.execute(
+        update(Book.__table__)
+        .where(Book.id == bindparam("target_id"))
+        .values(rating_delta_values(
+            new_rating - func.coalesce(previous, 0.0),
+            case((previous.is_(None), 1), else_=0)
+        )),
+        [
+            {"voter_id": row["user_id"], "target_id": row["book_id"], "new_rating": row["rating"]}
+            for row in rows
+        ]
+    )
+    upsert_ratings(db, rows)
+    db.commit()
+    bump_catalog_version()
+
+def remove_user_ratings(db: Session, user_id: int):
+    # Takes a user's votes back out of the book counters and deletes them;
+    # the caller commits.
+    rows = db.execute(
+        select(UserRating.book_id, UserRating.rating).where(UserRating.user_id == user_id)
+    ).all()
+    if rows:
+        db.execute(
+            update(Book.__table__)
+            .where(Book.id == bindparam("target_id"))
+            .values(rating_delta_values(bindparam("delta_sum"), -1)),
+            [{"target_id": row.book_id, "delta_sum": -row.rating} for row in rows]
+        )
+    db.execute(delete(UserRating).where(UserRating.user_id == user_id))
+    return len(rows)
+
+def write_queued_ratings(db: Session, rows):
+    # Ratings whose book or user was deleted while they waited are skipped.
+    book_ids = {row["book_id"] for row in rows}
+    user_ids = {row["user_id"] for row in rows}
+    found = set(db.scalars(select(Book.id).where(Book.id.in_(book_ids))))
+    users = set(db.scalars(select(User.id).where(User.id.in_(user_ids))))
+    rows = [row for row in rows if row["book_id"] in found and row["user_id"] in users]
+    if rows:
+        write_ratings(db, rows)
+
+rating_queue = WriteBehindQueue(
+    "ratings", SessionLocal, write_queued_ratings,
+    max_size=config.RATING_QUEUE_SIZE,
+    max_batch=config.RATING_FLUSH_MAX_BATCH,
+    interval_ms=config.RATING_FLUSH_INTERVAL_MS,
+)
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import threading
+import uuid
+import config
+from cache import TTLCache
+
+# Bumped after every write to books, authors or ratings. Cached responses are
+# keyed by it, so a write makes every older entry unreachable at once.
+class CatalogVersion:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self):
+        return self._value
+
+    def bump(self):
+        with self._lock:
+            self._value += 1
+            return self._value
+
+# The same interface backed by a file, for several worker processes on one
+# box. Each bump atomically replaces the file with a fresh random token, so
+# two bumps never produce the same version; reading it is one small read.
+class FileCatalogVersion:
+    def __init__(self, path: str):
+        self.path = path
+        if not os.path.exists(path):
+            self.bump()
+
+    @property
+    def value(self):
+        try:
+            with open(self.path) as version_file:
+                return version_file.read()
+        except OSError:
+            return None
+
+    def bump(self):
+        value = uuid.uuid4().hex
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w") as version_file:
+            version_file.write(value)
+        os.replace(tmp_path, self.path)
+        return value
+
+if config.CATALOG_VERSION_FILE:
+    catalog_version = FileCatalogVersion(config.CATALOG_VERSION_FILE)
+else:
+    catalog_version = CatalogVersion()
+
+def bump_catalog_version():
+    return catalog_version.bump()
+
+def etag_for(body: bytes):
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+def etag_matches(if_none_match: str, etag: str):
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+# Pure ASGI middleware for the public catalog GETs. Hits are answered without
+# touching the router or the database; the backend only needs get() and
+# set(), so anything shaped like TTLCache can be plugged in.
+class ResponseCacheMiddleware:
+    def __init__(self, app, backend=None, prefixes=("/books", "/authors"),
+                 exclude=("/books/export",), max_age: int = 0, version=catalog_version):
+        self.app = app
+        self.backend = backend if backend is not None else TTLCache()
+        self.prefixes = prefixes
+        self.exclude = exclude
+        self.cache_control = f"public, max-age={max_age}, must-revalidate".encode()
+        self.version = version
+
+    def cacheable(self, scope):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return False
+        path = scope["path"]
+        return path.startswith(self.prefixes) and path not in self.exclude
+
+    async def __call__(self, scope, receive, send):
+        if not self.cacheable(scope):
+            await self.app(scope, receive, send)
+            return
+
+        version = self.version.value
+        if version is None:
+            await self.app(scope, receive, send)
+            return
+        key = f"{version}:{scope['path']}?{scope['query_string'].decode('latin-1')}"
+        if_none_match = ""
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+
+        entry = self.backend.get(key)
+        if entry is not None:
+            scope["response_cache"] = "hit"
+        else:
+            entry = await self.render(scope, receive)
+            # A write that landed mid-request may not be in this body.
+            if entry[0] == 200 and self.version.value == version:
+                self.backend.set(key, entry)
+        await self.respond(entry, if_none_match, send)
+
+    async def render(self, scope, receive):
+        start = {}
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        body = b"".join(chunks)
+        headers = list(start.get("headers", []))
+        etag = None
+        if start["status"] == 200:
+            etag = etag_for(body)
+            headers += [(b"etag", etag.encode()), (b"cache-control", self.cache_control)]
+        return start["status"], headers, body, etag
+
+    async def respond(self, entry, if_none_match, send):
+        status, headers, body, etag = entry
+        if etag and etag_matches(if_none_match, etag):
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(b"etag", etag.encode()), (b"cache-control", self.cache_control)],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+from fastapi.security import OAuth2PasswordRequestForm
+from database import get_async_db
+from schemas import Token
+from auth import verify_password_async
+from routers.auth import get_user_by_username, login_failed, token_response
+
+router = APIRouter(prefix="/auth", tags=["authentication"], include_in_schema=False)
+
+@router.post("/token", response_model=Token)
+async def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db=Depends(get_async_db)
+):
+    user = await db.run_sync(get_user_by_username, form_data.username)
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
+        raise login_failed()
+    return token_response(user)
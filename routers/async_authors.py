@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, Query, Response
+from typing import List, Optional, Union
+from database import get_async_db
+from schemas import Author as AuthorSchema, AuthorListItem, BookSummary
+from pagination import NEXT_CURSOR_HEADER
+from serialization import fast_json_response
+from routers.authors import (
+    AuthorListParams,
+    list_authors,
+    get_author,
+    find_authors,
+    list_author_books,
+    list_author_rows,
+    get_author_row,
+    find_author_rows
+)
+import config
+
+# Async twins of the read endpoints in routers/authors.py, see async_books.py.
+router = APIRouter(prefix="/authors", tags=["authors"], include_in_schema=False)
+
+@router.get("/", response_model=Union[List[AuthorSchema], List[AuthorListItem]])
+async def read_authors(
+    response: Response,
+    params: AuthorListParams = Depends(),
+    db=Depends(get_async_db)
+):
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(*await db.run_sync(list_author_rows, params))
+    authors, next_cursor = await db.run_sync(list_authors, params)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return authors
+
+@router.get("/{author_id:int}", response_model=AuthorSchema)
+async def read_author(author_id: int, db=Depends(get_async_db)):
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(await db.run_sync(get_author_row, author_id))
+    return await db.run_sync(get_author, author_id)
+
+@router.get("/{author_id:int}/books", response_model=List[BookSummary])
+async def read_author_books(
+    author_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    db=Depends(get_async_db)
+):
+    books, next_cursor = await db.run_sync(list_author_books, author_id, limit, cursor, sort)
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(books, next_cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return books
+
+@router.get("/search/{query}", response_model=List[AuthorSchema])
+async def search_authors(
+    query: str,
+    limit: int = 100,
+    offset: int = 0,
+    db=Depends(get_async_db)
+):
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(await db.run_sync(find_author_rows, query, limit, offset))
+    return await db.run_sync(find_authors, query, limit, offset)
@@ -0,0 +1,91 @@
+from fastapi import APIRouter, Depends, Query, Response, Body
+from typing import List, Optional, Union
+from database import get_async_db
+from schemas import Book as BookSchema, BookListItem, RankedBook, RatingBatch, RatingBatchResult
+from auth import get_current_user_async
+from models import User
+from pagination import NEXT_CURSOR_HEADER
+from serialization import fast_json_response
+import config
+from routers.books import (
+    BookListParams,
+    list_books,
+    get_book,
+    find_books,
+    list_book_rows,
+    get_book_row,
+    find_book_rows,
+    top_books,
+    parse_rating,
+    rating_queue,
+    queue_rating,
+    save_rating,
+    save_ratings
+)
+
+# Async twins of the hot endpoints in routers/books.py. They run the same
+# query functions through AsyncSession.run_sync and are registered ahead of
+# the sync router when USE_ASYNC_DB is on; other routes fall through to it,
+# which is why ids use the :int converter and never shadow static paths.
+router = APIRouter(prefix="/books", tags=["books"], include_in_schema=False)
+
+@router.get("/", response_model=Union[List[BookSchema], List[BookListItem]])
+async def read_books(
+    response: Response,
+    params: BookListParams = Depends(),
+    db=Depends(get_async_db)
+):
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(*await db.run_sync(list_book_rows, params))
+    books, next_cursor = await db.run_sync(list_books, params)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return books
+
+@router.get("/top", response_model=List[RankedBook])
+async def read_top_books(
+    limit: int = Query(10, ge=1, le=100),
+    year: Optional[int] = None,
+    db=Depends(get_async_db)
+):
+    books = await db.run_sync(top_books, limit, year)
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(books)
+    return books
+
+@router.get("/{book_id:int}", response_model=BookSchema)
+async def read_book(book_id: int, db=Depends(get_async_db)):
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(await db.run_sync(get_book_row, book_id))
+    return await db.run_sync(get_book, book_id)
+
+@router.get("/search/{query}", response_model=List[BookSchema])
+async def search_books(
+    query: str,
+    limit: int = 100,
+    offset: int = 0,
+    db=Depends(get_async_db)
+):
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(await db.run_sync(find_book_rows, query, limit, offset))
+    return await db.run_sync(find_books, query, limit, offset)
+
+@router.post("/{book_id:int}/rate", response_model=BookSchema)
+async def rate_book(
+    book_id: int,
+    rating_data: dict = Body(...),
+    db=Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    rating = parse_rating(rating_data)
+    if rating_queue.running:
+        return await db.run_sync(queue_rating, book_id, current_user.id, rating)
+    return await db.run_sync(save_rating, book_id, current_user.id, rating)
+
+@router.post("/ratings:batch", response_model=RatingBatchResult)
+async def rate_books(
+    batch: RatingBatch,
+    db=Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    return await db.run_sync(save_ratings, current_user.id, batch)
@@ -1,16 +1,21 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from database import get_db
 from models import User
 from schemas import Token, UserCreate, UserResponse
+from response_cache import bump_catalog_version
+from ratings import remove_user_ratings
 from auth import (
-    verify_password,
+    verify_password_async,
     get_password_hash,
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
-    get_current_user
+    get_current_user,
+    user_claims,
+    forget_user
 )
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
@@ -35,23 +40,33 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     db.refresh(db_user)
     return db_user
 
+def get_user_by_username(db: Session, username: str):
+    return db.query(User).filter(User.username == username).first()
+
+def login_failed():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Incorrect username or password",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def token_response(user: User):
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data=user_claims(user), expires_delta=access_token_expires
+    )
+    return {"access_token": access_token, "token_type": "bearer"}
+
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    # Only the lookup takes a threadpool thread; bcrypt waits on its own pool.
+    user = await run_in_threadpool(get_user_by_username, db, form_data.username)
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
+        raise login_failed()
+    return token_response(user)
 
 @router.get("/users", response_model=list[UserResponse])
 def list_users(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -67,6 +82,10 @@ def delete_user(user_id: int, db: Session = Depends(get_db), current_user: User
     user = db.query(User).filter(User.id == user_id, User.username != "Admin").first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found or cannot delete admin")
+    # The user's ratings go with them, and out of the book averages.
+    remove_user_ratings(db, user_id)
     db.delete(user)
     db.commit()
+    forget_user(user_id)
+    bump_catalog_version()
     return {"message": "User deleted successfully"} 
\ No newline at end of file
@@ -1,18 +1,142 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
-from models import Author, Book
-from schemas import Author as AuthorSchema, AuthorCreate
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session, selectinload
+from typing import Annotated, List, Literal, Optional, Union
+from database import get_db, get_read_db, SessionLocal
+from models import Author, Book, UserRating, book_author
+from schemas import Author as AuthorSchema, AuthorCreate, AuthorListItem, BookSummary, BulkImportResult
 from auth import get_current_user
 from models import User
-from sqlalchemy import func
+from sqlalchemy import delete, func, select
+from search import search_ids, load_ranked
+from response_cache import bump_catalog_version
+from pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, SortKey, fetch_page
+from serialization import fast_json_response, group_by_parent, in_order
+from routers.books import BOOK_SORTS
+import bulk
+import config
 
 router = APIRouter(prefix="/authors", tags=["authors"])
+logger = logging.getLogger(__name__)
+
+AUTHOR_SORTS = {
+    "id": SortKey([Author.id], False),
+    "name": SortKey([Author.name, Author.id], False),
+}
+
+# schemas.Author's columns in field order, and those of its BookSummary list.
+AUTHOR_ROW_COLUMNS = [Author.name, Author.biography, Author.id]
+AUTHOR_BOOK_COLUMNS = [
+    Book.title, Book.isbn, Book.publication_year, Book.description, Book.id,
+    func.coalesce(Book.rating, 0.0).label("rating"),
+]
+
+# schemas.AuthorListItem: the count is an index-only lookup per author.
+AUTHOR_SUMMARY_COLUMNS = [
+    Author.name, Author.biography, Author.id,
+    select(func.count()).where(book_author.c.author_id == Author.id)
+    .correlate(Author).scalar_subquery().label("book_count"),
+]
 
 def is_admin(user):
     return user.username == "Admin"
 
+class AuthorListParams:
+    def __init__(
+        self,
+        skip: Annotated[int, Query(ge=0)] = 0,
+        limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = 100,
+        cursor: Optional[str] = None,
+        sort: str = "id",
+        view: Literal["full", "summary"] = "summary"
+    ):
+        self.skip = skip
+        self.limit = limit
+        self.cursor = cursor
+        self.sort = sort
+        self.view = view
+
+# Shared with routers/async_authors.py through AsyncSession.run_sync.
+def list_authors(db: Session, params: AuthorListParams):
+    if params.view == "summary":
+        return list_author_summaries(db, params)
+    return fetch_page(
+        db, Author, AUTHOR_SORTS, params.sort, params.limit,
+        cursor=params.cursor, skip=params.skip,
+        options=[selectinload(Author.books)]
+    )
+
+def list_author_summaries(db: Session, params: AuthorListParams):
+    rows, next_cursor = fetch_page(
+        db, Author, AUTHOR_SORTS, params.sort, params.limit,
+        cursor=params.cursor, skip=params.skip,
+        load_columns=AUTHOR_SUMMARY_COLUMNS
+    )
+    return [dict(row._mapping) for row in rows], next_cursor
+
+def list_author_books(db: Session, author_id: int, limit: int, cursor: Optional[str], sort: str):
+    if db.query(Author.id).filter(Author.id == author_id).first() is None:
+        raise HTTPException(status_code=404, detail="Author not found")
+    # The author's book ids come from ix_book_author_author_id.
+    rows, next_cursor = fetch_page(
+        db, Book, BOOK_SORTS, sort, limit, cursor=cursor,
+        filters=[Book.id.in_(
+            select(book_author.c.book_id).where(book_author.c.author_id == author_id)
+        )],
+        load_columns=AUTHOR_BOOK_COLUMNS
+    )
+    return [dict(row._mapping) for row in rows], next_cursor
+
+def get_author(db: Session, author_id: int):
+    db_author = db.query(Author).options(
+        selectinload(Author.books)
+    ).filter(Author.id == author_id).first()
+    if db_author is None:
+        raise HTTPException(status_code=404, detail="Author not found")
+    return db_author
+
+def find_authors(db: Session, query: str, limit: int, offset: int):
+    query = query.lower()
+    author_ids = search_ids(db, "authors_fts", query, limit=limit, offset=offset)
+    authors = load_ranked(db, Author, author_ids, selectinload(Author.books))
+    logger.debug("Author search %r found %d authors", query, len(authors))
+    return authors
+
+# Fast path twins for serialization.fast_json_response, see routers/books.py.
+def author_rows(db: Session, rows):
+    if not rows:
+        return []
+    books = group_by_parent(
+        db.query(book_author.c.author_id.label("parent_id"), *AUTHOR_BOOK_COLUMNS)
+        .join(Book, Book.id == book_author.c.book_id)
+        .filter(book_author.c.author_id.in_([row.id for row in rows]))
+        .order_by(Book.id)
+    )
+    return [dict(row._mapping, books=books.get(row.id, [])) for row in rows]
+
+def list_author_rows(db: Session, params: AuthorListParams):
+    if params.view == "summary":
+        return list_author_summaries(db, params)
+    rows, next_cursor = fetch_page(
+        db, Author, AUTHOR_SORTS, params.sort, params.limit,
+        cursor=params.cursor, skip=params.skip,
+        load_columns=AUTHOR_ROW_COLUMNS
+    )
+    return author_rows(db, rows), next_cursor
+
+def get_author_row(db: Session, author_id: int):
+    row = db.query(*AUTHOR_ROW_COLUMNS).filter(Author.id == author_id).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Author not found")
+    return author_rows(db, [row])[0]
+
+def find_author_rows(db: Session, query: str, limit: int, offset: int):
+    author_ids = search_ids(db, "authors_fts", query.lower(), limit=limit, offset=offset)
+    if not author_ids:
+        return []
+    rows = db.query(*AUTHOR_ROW_COLUMNS).filter(Author.id.in_(author_ids)).all()
+    return author_rows(db, in_order(rows, author_ids))
+
 @router.post("/", response_model=AuthorSchema)
 def create_author(
     author: AuthorCreate,
@@ -27,28 +151,56 @@ def create_author(
     )
     db.add(db_author)
     db.commit()
+    bump_catalog_version()
     db.refresh(db_author)
     return db_author
 
-@router.get("/", response_model=List[AuthorSchema])
+@router.get("/", response_model=Union[List[AuthorSchema], List[AuthorListItem]])
 def read_authors(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    response: Response,
+    params: AuthorListParams = Depends(),
+    db: Session = Depends(get_read_db)
 ):
-    authors = db.query(Author).offset(skip).limit(limit).all()
-    for author in authors:
-        _ = author.books
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(*list_author_rows(db, params))
+    authors, next_cursor = list_authors(db, params)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return authors
 
-@router.get("/{author_id}", response_model=AuthorSchema)
-def read_author(author_id: int, db: Session = Depends(get_db)):
-    db_author = db.query(Author).filter(Author.id == author_id).first()
-    if db_author is None:
-        raise HTTPException(status_code=404, detail="Author not found")
-    return db_author
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_authors(
+    request: Request,
+    batch_size: int = Query(1000, ge=1, le=10000),
+    current_user: User = Depends(get_current_user)
+):
+    if not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Only admin can import authors")
+    return await bulk.run_import(request, SessionLocal, bulk.import_authors, batch_size)
 
-@router.put("/{author_id}", response_model=AuthorSchema)
+@router.get("/{author_id:int}", response_model=AuthorSchema)
+def read_author(author_id: int, db: Session = Depends(get_read_db)):
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(get_author_row(db, author_id))
+    return get_author(db, author_id)
+
+@router.get("/{author_id:int}/books", response_model=List[BookSummary])
+def read_author_books(
+    author_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    db: Session = Depends(get_read_db)
+):
+    books, next_cursor = list_author_books(db, author_id, limit, cursor, sort)
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(books, next_cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return books
+
+@router.put("/{author_id:int}", response_model=AuthorSchema)
 def update_author(
     author_id: int,
     author: AuthorCreate,
@@ -63,10 +215,11 @@ def update_author(
     for field, value in author.dict().items():
         setattr(db_author, field, value)
     db.commit()
+    bump_catalog_version()
     db.refresh(db_author)
     return db_author
 
-@router.delete("/{author_id}")
+@router.delete("/{author_id:int}")
 def delete_author(
     author_id: int,
     db: Session = Depends(get_db),
@@ -74,30 +227,36 @@ def delete_author(
 ):
     if not is_admin(current_user):
         raise HTTPException(status_code=403, detail="Only admin can delete authors")
-    db_author = db.query(Author).filter(Author.id == author_id).first()
-    if db_author is None:
+    if db.query(Author.id).filter(Author.id == author_id).first() is None:
         raise HTTPException(status_code=404, detail="Author not found")
 
-    books = db_author.books[:]
-    deleted_books = []
-    for book in books:
-        db_author.books.remove(book)
-        db.commit() 
-        db.refresh(book)
-        if len(book.authors) == 0:
-            deleted_books.append(book.title)
-            db.delete(book)
-            db.commit()
-    db.delete(db_author)
+    # Books whose only author is this one, found with one grouped query.
+    orphans = select(book_author.c.book_id).where(
+        book_author.c.book_id.in_(
+            select(book_author.c.book_id).where(book_author.c.author_id == author_id)
+        )
+    ).group_by(book_author.c.book_id).having(
+        func.count(func.distinct(book_author.c.author_id)) == 1
+    )
+    deleted_books = list(db.scalars(
+        select(Book.title).where(Book.id.in_(orphans)).order_by(Book.id)
+    ))
+    no_sync = {"synchronize_session": False}
+    db.execute(delete(UserRating).where(UserRating.book_id.in_(orphans)), execution_options=no_sync)
+    db.execute(delete(Book).where(Book.id.in_(orphans)), execution_options=no_sync)
+    db.execute(delete(book_author).where(book_author.c.author_id == author_id))
+    db.execute(delete(Author).where(Author.id == author_id), execution_options=no_sync)
     db.commit()
+    bump_catalog_version()
     return {"message": f"Author and orphaned books deleted successfully", "deleted_books": deleted_books}
 
 @router.get("/search/{query}", response_model=List[AuthorSchema])
-def search_authors(query: str, db: Session = Depends(get_db)):
-    query = query.lower()
-    print(f"Searching for authors: {query}")  
-    authors = db.query(Author).filter(
-        Author.name.ilike(f"%{query}%")
-    ).all()
-    print(f"Found {len(authors)} authors")  
-    return authors 
+def search_authors(
+    query: str,
+    limit: int = 100,
+    offset: int = 0,
+    db: Session = Depends(get_read_db)
+):
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(find_author_rows(db, query, limit, offset))
+    return find_authors(db, query, limit, offset)
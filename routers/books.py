@@ -1,18 +1,245 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
-from models import Book, Author, UserRating
-from schemas import Book as BookSchema, BookCreate
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, Body
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.orm import Session, selectinload
+from typing import Annotated, List, Literal, Optional, Union
+from database import get_db, get_read_db, SessionLocal, ReadSessionLocal
+from models import Book, Author, UserRating, book_author
+from schemas import (
+    Book as BookSchema, BookCreate, BookListItem, BulkImportResult, RankedBook,
+    RatingBatch, RatingBatchResult
+)
 from auth import get_current_user
 from models import User
-from sqlalchemy import String, func
+from sqlalchemy import case, func, select
+from search import search_ids, load_ranked
+from response_cache import bump_catalog_version
+from ratings import apply_rating_delta, previous_rating, rating_queue, upsert_ratings, write_ratings
+from pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, SortKey, fetch_page
+from serialization import fast_json_response, group_by_parent, in_order
+import bulk
+import config
 
 router = APIRouter(prefix="/books", tags=["books"])
+logger = logging.getLogger(__name__)
+
+# Everything schemas.Book serialises, loaded in one extra query per relation.
+BOOK_DETAIL_OPTIONS = [selectinload(Book.authors), selectinload(Book.user_ratings)]
+
+# Columns behind schemas.BookListItem, selected without building Book objects.
+BOOK_SUMMARY_COLUMNS = [
+    Book.id, Book.title, Book.isbn, Book.publication_year,
+    func.coalesce(Book.rating, 0.0).label("rating"),
+    func.coalesce(Book.rating_count, 0).label("rating_count"),
+]
+
+# schemas.Book's columns in its field order, for the fast JSON path.
+BOOK_ROW_COLUMNS = [
+    Book.title, Book.isbn, Book.publication_year, Book.description, Book.id,
+    func.coalesce(Book.rating, 0.0).label("rating"),
+]
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+BOOK_SORTS = {
+    "id": SortKey([Book.id], False),
+    "title": SortKey([Book.title, Book.id], False),
+    "year": SortKey([Book.publication_year, Book.id], False),
+    "rating": SortKey([Book.rating, Book.id], False),
+    "-rating": SortKey([Book.rating, Book.id], True),
+}
 
 def is_admin(user):
     return user.username == "Admin"
 
+class BookListParams:
+    def __init__(
+        self,
+        skip: Annotated[int, Query(ge=0)] = 0,
+        limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = 100,
+        cursor: Optional[str] = None,
+        sort: str = "id",
+        view: Literal["full", "summary"] = "full",
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        min_rating: Annotated[Optional[float], Query(ge=0, le=5)] = None,
+        author_id: Optional[int] = None
+    ):
+        self.skip = skip
+        self.limit = limit
+        self.cursor = cursor
+        self.sort = sort
+        self.view = view
+        self.year_from = year_from
+        self.year_to = year_to
+        self.min_rating = min_rating
+        self.author_id = author_id
+
+    def filters(self):
+        # Pushed into the page query; the cursor only carries sort values,
+        # so clients resend the same filters with every page.
+        filters = []
+        if self.year_from is not None:
+            filters.append(Book.publication_year >= self.year_from)
+        if self.year_to is not None:
+            filters.append(Book.publication_year <= self.year_to)
+        if self.min_rating is not None:
+            filters.append(Book.rating >= self.min_rating)
+        if self.author_id is not None:
+            filters.append(Book.id.in_(
+                select(book_author.c.book_id).where(book_author.c.author_id == self.author_id)
+            ))
+        return filters
+
+# Query logic lives in plain functions taking a Session so the async routers
+# can run exactly the same code through AsyncSession.run_sync.
+def list_books(db: Session, params: BookListParams):
+    if params.view == "summary":
+        return list_book_summaries(db, params)
+    return fetch_page(
+        db, Book, BOOK_SORTS, params.sort, params.limit,
+        cursor=params.cursor, skip=params.skip, filters=params.filters(),
+        options=BOOK_DETAIL_OPTIONS
+    )
+
+def list_book_summaries(db: Session, params: BookListParams):
+    rows, next_cursor = fetch_page(
+        db, Book, BOOK_SORTS, params.sort, params.limit,
+        cursor=params.cursor, skip=params.skip, filters=params.filters(),
+        load_columns=BOOK_SUMMARY_COLUMNS
+    )
+    authors = book_authors(db, [row.id for row in rows], Author.id, Author.name) if rows else {}
+    items = [dict(row._mapping, authors=authors.get(row.id, [])) for row in rows]
+    return items, next_cursor
+
+def top_books(db: Session, limit: int, year: Optional[int] = None):
+    # Reads the first `limit` entries of a score index; see leaderboard.py.
+    query = db.query(*BOOK_SUMMARY_COLUMNS, Book.score).filter(Book.score.isnot(None))
+    if year is not None:
+        query = query.filter(Book.publication_year == year)
+    rows = query.order_by(Book.score.desc(), Book.id.desc()).limit(limit).all()
+    authors = book_authors(db, [row.id for row in rows], Author.id, Author.name) if rows else {}
+    return [dict(row._mapping, authors=authors.get(row.id, [])) for row in rows]
+
+def book_authors(db: Session, book_ids, *columns):
+    return group_by_parent(
+        db.query(book_author.c.book_id.label("parent_id"), *columns)
+        .join(Author, Author.id == book_author.c.author_id)
+        .filter(book_author.c.book_id.in_(book_ids))
+        .order_by(Author.id)
+    )
+
+# Fast path twins of list_books/get_book/find_books: dicts shaped like
+# schemas.Book built from column tuples, for serialization.fast_json_response.
+def book_rows(db: Session, rows):
+    if not rows:
+        return []
+    book_ids = [row.id for row in rows]
+    authors = book_authors(db, book_ids, Author.name, Author.biography, Author.id)
+    ratings = group_by_parent(
+        db.query(
+            UserRating.book_id.label("parent_id"),
+            UserRating.rating, UserRating.id, UserRating.user_id, UserRating.book_id
+        ).filter(UserRating.book_id.in_(book_ids)).order_by(UserRating.id)
+    )
+    return [
+        dict(row._mapping, authors=authors.get(row.id, []), user_ratings=ratings.get(row.id, []))
+        for row in rows
+    ]
+
+def list_book_rows(db: Session, params: BookListParams):
+    if params.view == "summary":
+        return list_book_summaries(db, params)
+    rows, next_cursor = fetch_page(
+        db, Book, BOOK_SORTS, params.sort, params.limit,
+        cursor=params.cursor, skip=params.skip, filters=params.filters(),
+        load_columns=BOOK_ROW_COLUMNS
+    )
+    return book_rows(db, rows), next_cursor
+
+def get_book_row(db: Session, book_id: int):
+    row = db.query(*BOOK_ROW_COLUMNS).filter(Book.id == book_id).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return book_rows(db, [row])[0]
+
+def find_book_rows(db: Session, query: str, limit: int, offset: int):
+    book_ids = search_ids(db, "books_fts", query.lower(), limit=limit, offset=offset)
+    if not book_ids:
+        return []
+    rows = db.query(*BOOK_ROW_COLUMNS).filter(Book.id.in_(book_ids)).all()
+    return book_rows(db, in_order(rows, book_ids))
+
+def get_book(db: Session, book_id: int):
+    db_book = db.query(Book).options(*BOOK_DETAIL_OPTIONS).filter(Book.id == book_id).first()
+    if db_book is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return db_book
+
+def find_books(db: Session, query: str, limit: int, offset: int):
+    query = query.lower()
+    book_ids = search_ids(db, "books_fts", query, limit=limit, offset=offset)
+    books = load_ranked(db, Book, book_ids, *BOOK_DETAIL_OPTIONS)
+    logger.debug("Book search %r found %d books", query, len(books))
+    return books
+
+def parse_rating(rating_data: dict):
+    rating = rating_data.get('rating')
+    if rating is None:
+        raise HTTPException(status_code=422, detail="Rating is required")
+    try:
+        rating = float(rating)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail="Rating must be a number")
+    if not 0 <= rating <= 5:
+        raise HTTPException(status_code=400, detail="Rating must be between 0 and 5")
+    return rating
+
+def save_rating(db: Session, book_id: int, user_id: int, rating: float):
+    if db.query(Book.id).filter(Book.id == book_id).first() is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    previous = previous_rating(user_id, book_id)
+    # Counters first: that UPDATE takes SQLite's write lock, so the previous
+    # rating it reads cannot change before the upsert below replaces it.
+    apply_rating_delta(
+        db, book_id,
+        rating - func.coalesce(previous, 0.0),
+        case((previous.is_(None), 1), else_=0)
+    )
+    upsert_ratings(db, [{"user_id": user_id, "book_id": book_id, "rating": rating}])
+    db.commit()
+    bump_catalog_version()
+    return get_book(db, book_id)
+
+def queue_rating(db: Session, book_id: int, user_id: int, rating: float):
+    if db.query(Book.id).filter(Book.id == book_id).first() is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    rating_queue.put({"user_id": user_id, "book_id": book_id, "rating": rating})
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"message": "Rating accepted", "book_id": book_id, "rating": rating}
+    )
+
+def save_ratings(db: Session, user_id: int, batch: RatingBatch):
+    # The last rating of a book in the batch wins.
+    ratings = {item.book_id: item.rating for item in batch.ratings}
+    found = set(db.scalars(select(Book.id).where(Book.id.in_(list(ratings)))))
+    missing = [book_id for book_id in ratings if book_id not in found]
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Books not found: {', '.join(str(book_id) for book_id in missing)}"
+        )
+
+    write_ratings(db, [
+        {"user_id": user_id, "book_id": book_id, "rating": rating}
+        for book_id, rating in ratings.items()
+    ])
+    books = db.query(Book.id, Book.rating, Book.rating_count).filter(
+        Book.id.in_(list(ratings))
+    ).order_by(Book.id).all()
+    return {"saved": len(ratings), "books": [row._mapping for row in books]}
+
 @router.post("/", response_model=BookSchema)
 def create_book(
     book: BookCreate,
@@ -21,8 +248,7 @@ def create_book(
 ):
     if not is_admin(current_user):
         raise HTTPException(status_code=403, detail="Only admin can create books")
-    db_book = db.query(Book).filter(Book.isbn == book.isbn).first()
-    if db_book:
+    if db.query(Book.id).filter(Book.isbn == book.isbn).first():
         raise HTTPException(status_code=400, detail="ISBN already registered")
     authors = db.query(Author).filter(Author.id.in_(book.author_ids)).all()
     if len(authors) != len(book.author_ids):
@@ -36,31 +262,59 @@ def create_book(
     )
     db.add(db_book)
     db.commit()
+    bump_catalog_version()
     db.refresh(db_book)
     return db_book
 
-@router.get("/", response_model=List[BookSchema])
+@router.get("/", response_model=Union[List[BookSchema], List[BookListItem]])
 def read_books(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    response: Response,
+    params: BookListParams = Depends(),
+    db: Session = Depends(get_read_db)
+):
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(*list_book_rows(db, params))
+    books, next_cursor = list_books(db, params)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return books
+
+@router.get("/export")
+def export_books(fmt: str = Query("ndjson", alias="format")):
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    # The generator owns its session: rows are written as they are fetched.
+    return StreamingResponse(
+        bulk.export_books(ReadSessionLocal, fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt]
+    )
+
+@router.get("/top", response_model=List[RankedBook])
+def read_top_books(
+    limit: int = Query(10, ge=1, le=100),
+    year: Optional[int] = None,
+    db: Session = Depends(get_read_db)
 ):
-    books = db.query(Book).offset(skip).limit(limit).all()
-    for book in books:
-        ratings = db.query(UserRating.rating).filter(UserRating.book_id == book.id).all()
-        if ratings:
-            avg_rating = sum(r[0] for r in ratings) / len(ratings)
-            book.rating = round(avg_rating, 2)
-        else:
-            book.rating = 0.0
+    books = top_books(db, limit, year)
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(books)
     return books
 
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_books(
+    request: Request,
+    batch_size: int = Query(1000, ge=1, le=10000),
+    current_user: User = Depends(get_current_user)
+):
+    if not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Only admin can import books")
+    return await bulk.run_import(request, SessionLocal, bulk.import_books, batch_size)
+
 @router.get("/{book_id}", response_model=BookSchema)
-def read_book(book_id: int, db: Session = Depends(get_db)):
-    db_book = db.query(Book).filter(Book.id == book_id).first()
-    if db_book is None:
-        raise HTTPException(status_code=404, detail="Book not found")
-    return db_book
+def read_book(book_id: int, db: Session = Depends(get_read_db)):
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(get_book_row(db, book_id))
+    return get_book(db, book_id)
 
 @router.put("/{book_id}", response_model=BookSchema)
 def update_book(
@@ -81,6 +335,7 @@ def update_book(
         raise HTTPException(status_code=400, detail="One or more authors not found")
     db_book.authors = authors
     db.commit()
+    bump_catalog_version()
     db.refresh(db_book)
     return db_book
 
@@ -97,26 +352,27 @@ def delete_book(
         raise HTTPException(status_code=404, detail="Book not found")
     db.delete(db_book)
     db.commit()
+    bump_catalog_version()
     return {"message": "Book deleted successfully"}
 
 @router.get("/search/{query}", response_model=List[BookSchema])
-def search_books(query: str, db: Session = Depends(get_db)):
-    query = query.lower()
-    print(f"Searching for: {query}")  # Debug log
-    books = db.query(Book).filter(
-        (func.lower(Book.title).like(f"%{query}%")) |
-        (func.lower(Book.isbn).like(f"%{query}%")) |
-        (func.cast(Book.publication_year, String).like(f"%{query}%"))
-    ).all()
-    print(f"Found {len(books)} books")  # Debug log
-    for book in books:
-        ratings = db.query(UserRating.rating).filter(UserRating.book_id == book.id).all()
-        if ratings:
-            avg_rating = sum(r[0] for r in ratings) / len(ratings)
-            book.rating = round(avg_rating, 2)
-        else:
-            book.rating = 0.0
-    return books
+def search_books(
+    query: str,
+    limit: int = 100,
+    offset: int = 0,
+    db: Session = Depends(get_read_db)
+):
+    if config.FAST_JSON_RESPONSES:
+        return fast_json_response(find_book_rows(db, query, limit, offset))
+    return find_books(db, query, limit, offset)
+
+@router.post("/ratings:batch", response_model=RatingBatchResult)
+def rate_books(
+    batch: RatingBatch,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return save_ratings(db, current_user.id, batch)
 
 @router.post("/{book_id}/rate", response_model=BookSchema)
 def rate_book(
@@ -125,37 +381,7 @@ def rate_book(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    rating = rating_data.get('rating')
-    if rating is None:
-        raise HTTPException(status_code=422, detail="Rating is required")
-    try:
-        rating = float(rating)
-    except (TypeError, ValueError):
-        raise HTTPException(status_code=422, detail="Rating must be a number")
-    if not 0 <= rating <= 5:
-        raise HTTPException(status_code=400, detail="Rating must be between 0 and 5")
-    db_book = db.query(Book).filter(Book.id == book_id).first()
-    if db_book is None:
-        raise HTTPException(status_code=404, detail="Book not found")
-    existing_rating = db.query(UserRating).filter(
-        UserRating.user_id == current_user.id,
-        UserRating.book_id == book_id
-    ).first()
-    if existing_rating:
-        db.delete(existing_rating)
-        db.flush()
-    new_rating = UserRating(
-        user_id=current_user.id,
-        book_id=book_id,
-        rating=rating
-    )
-    db.add(new_rating)
-    ratings = db.query(UserRating.rating).filter(UserRating.book_id == book_id).all()
-    if ratings:
-        avg_rating = sum(r[0] for r in ratings) / len(ratings)
-        db_book.rating = round(avg_rating, 2)
-    else:
-        db_book.rating = 0.0
-    db.commit()
-    db.refresh(db_book)
-    return db_book 
\ No newline at end of file
+    rating = parse_rating(rating_data)
+    if rating_queue.running:
+        return queue_rating(db, book_id, current_user.id, rating)
+    return save_rating(db, book_id, current_user.id, rating)
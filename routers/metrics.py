@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from auth import password_hasher
+from ratings import rating_queue
+from metrics import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def gauge_lines(prefix, stats):
+    lines = []
+    for name, value in stats.items():
+        metric = f"{prefix}_{name}"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value:g}")
+    return lines
+
+# Counters are per process: with several workers, scrape each one or sum them.
+@router.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return PlainTextResponse(
+        render_metrics(
+            gauge_lines("password_hasher", password_hasher.stats())
+            + gauge_lines("rating_queue", rating_queue.stats())
+        ),
+        media_type=PROMETHEUS_CONTENT_TYPE
+    )
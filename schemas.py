@@ -1,6 +1,7 @@
 from __future__ import annotations
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
+import config
 
 class UserBase(BaseModel):
     username: str
@@ -42,6 +43,12 @@ class Author(AuthorBase):
     class Config:
         from_attributes = True
 
+# Lean author entry: a count instead of the bibliography, which is paged
+# through GET /authors/{id}/books.
+class AuthorListItem(AuthorBase):
+    id: int
+    book_count: int
+
 class BookBase(BaseModel):
     title: str
     isbn: str
@@ -54,6 +61,25 @@ class BookSummary(BookBase):
     class Config:
         from_attributes = True
 
+# Compact listing entry: no description and an aggregate instead of the
+# individual rating rows. The full record stays at GET /books/{id}.
+class AuthorRef(BaseModel):
+    id: int
+    name: str
+
+class BookListItem(BaseModel):
+    id: int
+    title: str
+    isbn: str
+    publication_year: int
+    rating: float
+    rating_count: int
+    authors: List[AuthorRef]
+
+# GET /books/top entry: the compact listing plus the leaderboard score.
+class RankedBook(BookListItem):
+    score: float
+
 class BookCreate(BookBase):
     author_ids: List[int]
 
@@ -80,6 +106,32 @@ class Book(BookBase):
     class Config:
         from_attributes = True
 
+class BulkImportError(BaseModel):
+    line: int
+    error: str
+
+class BulkImportResult(BaseModel):
+    processed: int
+    created: int
+    updated: int
+    errors: List[BulkImportError]
+
+class BookRating(BaseModel):
+    book_id: int
+    rating: float = Field(ge=0, le=5)
+
+class RatingBatch(BaseModel):
+    ratings: List[BookRating] = Field(min_length=1, max_length=config.RATING_BATCH_MAX_SIZE)
+
+class RatedBook(BaseModel):
+    id: int
+    rating: float
+    rating_count: int
+
+class RatingBatchResult(BaseModel):
+    saved: int
+    books: List[RatedBook]
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -0,0 +1,83 @@
+import re
+from sqlalchemy import text
+
+# External-content FTS5 tables: the index stores only tokens, the text stays in
+# books/authors. Triggers keep it in sync with every ORM or raw SQL write.
+SEARCH_INDEXES = {
+    "books_fts": {
+        "table": "books",
+        "columns": ["title", "description", "isbn", "publication_year"],
+        # bm25 column weights, in column order
+        "weights": [10.0, 1.0, 5.0, 2.0],
+    },
+    "authors_fts": {
+        "table": "authors",
+        "columns": ["name", "biography"],
+        "weights": [10.0, 1.0],
+    },
+}
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def _index_ddl(name, table, columns):
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {name} USING fts5("
+        f"{cols}, content='{table}', content_rowid='id', tokenize='unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {name}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {name}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+    ]
+
+def create_search_tables(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    for name, spec in SEARCH_INDEXES.items():
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": name}
+        ).first()
+        if exists:
+            continue
+        for statement in _index_ddl(name, spec["table"], spec["columns"]):
+            connection.exec_driver_sql(statement)
+        # Index rows that were already in the table before the index existed.
+        connection.exec_driver_sql(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+
+def rebuild_search_tables(connection):
+    for name in SEARCH_INDEXES:
+        connection.exec_driver_sql(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+
+def build_match_query(query: str):
+    # Every word must match, each as a prefix: "tolst war" -> "tolst"* "war"*
+    tokens = TOKEN_RE.findall(query.lower())
+    return " ".join(f'"{token}"*' for token in tokens)
+
+def search_ids(db, index: str, query: str, limit: int = 100, offset: int = 0):
+    match = build_match_query(query)
+    if not match:
+        return []
+    weights = ", ".join(str(w) for w in SEARCH_INDEXES[index]["weights"])
+    rows = db.execute(
+        text(
+            f"SELECT rowid FROM {index} WHERE {index} MATCH :match "
+            f"ORDER BY bm25({index}, {weights}) LIMIT :limit OFFSET :offset"
+        ),
+        {"match": match, "limit": limit, "offset": offset}
+    ).all()
+    return [row[0] for row in rows]
+
+def load_ranked(db, model, ids, *options):
+    if not ids:
+        return []
+    by_id = {
+        obj.id: obj
+        for obj in db.query(model).options(*options).filter(model.id.in_(ids)).all()
+    }
+    return [by_id[i] for i in ids if i in by_id]
@@ -0,0 +1,26 @@
+from importlib.util import find_spec
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pagination import NEXT_CURSOR_HEADER
+
+# orjson is optional; the stdlib encoder gives the same JSON, slower.
+# ORJSONResponse imports without it and only fails when rendering.
+FastJSONResponse = ORJSONResponse if find_spec("orjson") else JSONResponse
+
+# The fast path for hot reads: handlers build plain dicts straight from
+# column tuples, shaped exactly like the response_model, and return them
+# here so FastAPI skips validating and re-encoding every object.
+def fast_json_response(content, next_cursor=None):
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return FastJSONResponse(content, headers=headers)
+
+def group_by_parent(rows):
+    # Rows carry a "parent_id" label; the rest of each row becomes a child dict.
+    groups = {}
+    for row in rows:
+        values = dict(row._mapping)
+        groups.setdefault(values.pop("parent_id"), []).append(values)
+    return groups
+
+def in_order(rows, ids):
+    by_id = {row.id: row for row in rows}
+    return [by_id[i] for i in ids if i in by_id]
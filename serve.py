@@ -0,0 +1,99 @@
+"""Production launcher: N worker processes serving main:app on one socket.
+
+Usage: python serve.py [--workers N] [--host HOST] [--port PORT]
+
+Run `python manage.py migrate` first. With gunicorn installed (Linux/macOS)
+the workers are supervised by gunicorn: `kill -HUP <master pid>` reloads code
+and settings by starting fresh workers and letting the old ones finish their
+requests. Without it (e.g. on Windows) uvicorn's own supervisor is used,
+which restarts dead workers but cannot reload.
+"""
+import argparse
+import importlib
+import os
+import config
+
+def default_version_file():
+    # Next to the SQLite file, so every worker of this catalog shares it.
+    prefix = "sqlite:///"
+    if config.DATABASE_URL.startswith(prefix) and ":memory:" not in config.DATABASE_URL:
+        return os.path.abspath(config.DATABASE_URL[len(prefix):]) + ".version"
+    return ""
+
+def prepare_environment(workers: int):
+    # Settings every worker must agree on, exported before they start so both
+    # forked (gunicorn) and spawned (uvicorn) workers read the same values.
+    os.environ.setdefault("CATALOG_VERSION_FILE", default_version_file())
+    # bcrypt threads are per process: split the cores instead of giving every
+    # worker its own full set.
+    hash_workers = max(1, (os.cpu_count() or 1) // workers)
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", str(hash_workers))
+    importlib.reload(config)
+
+def gunicorn_options(args):
+    return {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": "serve.CatalogWorker",
+        "keepalive": config.WEB_KEEPALIVE,
+        "backlog": config.WEB_BACKLOG,
+        "graceful_timeout": config.WEB_GRACEFUL_TIMEOUT,
+        "max_requests": config.WEB_MAX_REQUESTS,
+        "max_requests_jitter": config.WEB_MAX_REQUESTS // 10,
+        # Each worker imports the app itself, so no engine, pool or cache is
+        # ever created before the fork.
+        "preload_app": False,
+    }
+
+try:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+except ImportError:
+    BaseApplication = None
+else:
+    class CatalogWorker(UvicornWorker):
+        # UvicornWorker does not map limit_concurrency from gunicorn settings.
+        CONFIG_KWARGS = dict(
+            UvicornWorker.CONFIG_KWARGS,
+            limit_concurrency=config.WEB_LIMIT_CONCURRENCY or None
+        )
+
+    class CatalogApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            return app
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=config.WEB_WORKERS)
+    parser.add_argument("--host", default=config.WEB_HOST)
+    parser.add_argument("--port", type=int, default=config.WEB_PORT)
+    args = parser.parse_args(argv)
+    prepare_environment(args.workers)
+
+    if BaseApplication is not None:
+        CatalogApplication(gunicorn_options(args)).run()
+        return
+    import uvicorn
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_keep_alive=config.WEB_KEEPALIVE,
+        backlog=config.WEB_BACKLOG,
+        limit_concurrency=config.WEB_LIMIT_CONCURRENCY or None,
+        limit_max_requests=config.WEB_MAX_REQUESTS or None,
+        timeout_graceful_shutdown=config.WEB_GRACEFUL_TIMEOUT,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ let currentUser = localStorage.getItem('currentUser') || null;
 let token = localStorage.getItem('token') || null;
 let authors = []; 
 let allBooks = []; 
+// Books are sorted by the server; see the sort options of GET /books/.
+let bookSort = 'id';
 
 const contentDiv = document.getElementById('content');
 const loginBtn = document.getElementById('login-btn');
@@ -194,7 +196,7 @@ function createAuthorCard(author) {
                     <h5 class="card-title">${author.name}</h5>
                     <p class="card-text">${author.biography || 'No biography available'}</p>
                     <p class="card-text">
-                        <small class="text-muted">Books: ${author.books?.length || 0}</small>
+                        <small class="text-muted">Books: ${author.book_count ?? author.books?.length ?? 0}</small>
                     </p>
                     ${isAdmin() ? `
                         <div class="btn-group">
@@ -322,13 +324,8 @@ function showAuthorDetails(author) {
                             </div>
                             <div class="col-md-6">
                                 <h6>Books</h6>
-                                <ul class="list-group">
-                                    ${author.books?.map(book => `
-                                        <li class="list-group-item book-link" data-id="${book.id}">
-                                            ${book.title} (${book.publication_year})
-                                        </li>
-                                    `).join('') || '<li class="list-group-item">No books found</li>'}
-                                </ul>
+                                <ul class="list-group" id="author-books-list"></ul>
+                                <button type="button" class="btn btn-link d-none" id="author-books-more">Load more</button>
                             </div>
                         </div>
                     </div>
@@ -352,19 +349,7 @@ function showAuthorDetails(author) {
 
     const modal = new bootstrap.Modal(document.getElementById('authorDetailsModal'));
     modal.show();
-
-    document.querySelectorAll('.book-link').forEach(link => {
-        link.addEventListener('click', () => {
-            const bookId = link.dataset.id;
-            modal.hide();
-            loadBooks(() => {
-                const book = allBooks.find(b => b.id === parseInt(bookId));
-                if (book) {
-                    showBookDetails(book, currentUser);
-                }
-            }); 
-        });
-    });
+    loadAuthorBooks(author.id, modal);
 
     document.getElementById('editAuthorBtn')?.addEventListener('click', () => {
         modal.hide();
@@ -372,6 +357,47 @@ function showAuthorDetails(author) {
     });
 }
 
+// The bibliography is paged from the server rather than embedded in the author.
+async function loadAuthorBooks(authorId, modal, cursor = null) {
+    const list = document.getElementById('author-books-list');
+    const moreButton = document.getElementById('author-books-more');
+    const params = new URLSearchParams({ limit: 50 });
+    if (cursor) {
+        params.set('cursor', cursor);
+    }
+    try {
+        const response = await fetch(`/authors/${authorId}/books?${params}`);
+        const books = await response.json();
+        if (!cursor && books.length === 0) {
+            list.innerHTML = '<li class="list-group-item">No books found</li>';
+        }
+        list.insertAdjacentHTML('beforeend', books.map(book => `
+            <li class="list-group-item book-link" data-id="${book.id}">
+                ${book.title} (${book.publication_year})
+            </li>
+        `).join(''));
+        list.querySelectorAll('.book-link:not([data-bound])').forEach(link => {
+            link.dataset.bound = 'true';
+            link.addEventListener('click', () => {
+                const bookId = link.dataset.id;
+                modal.hide();
+                loadBooks(() => {
+                    const book = allBooks.find(b => b.id === parseInt(bookId));
+                    if (book) {
+                        showBookDetails(book, currentUser);
+                    }
+                });
+            });
+        });
+        const nextCursor = response.headers.get('X-Next-Cursor');
+        moreButton.classList.toggle('d-none', !nextCursor);
+        moreButton.onclick = () => loadAuthorBooks(authorId, modal, nextCursor);
+    } catch (error) {
+        console.error('Error loading author books:', error);
+        list.innerHTML = '<li class="list-group-item">Error loading books</li>';
+    }
+}
+
 function showEditAuthorForm(author) {
     const formHtml = `
         <div class="card">
@@ -517,7 +543,7 @@ document.querySelectorAll('.edit-book')?.forEach(btn => btn.remove());
 
 async function loadBooks(callback, setActive = true) {
     try {
-        const response = await fetch('/books/');
+        const response = await fetch(`/books/?sort=${encodeURIComponent(bookSort)}`);
         allBooks = await response.json();
         console.log('Loaded books:', allBooks);  
         
@@ -526,6 +552,13 @@ async function loadBooks(callback, setActive = true) {
                 <div class="col-12">
                     <div class="d-flex align-items-stretch" style="gap: 1rem;">
                         <input type="text" class="form-control flex-grow-1" id="book-search" placeholder="Search by title, ISBN, or year...">
+                        <select class="form-select w-auto" id="book-sort">
+                            <option value="id">Date added</option>
+                            <option value="title">Title</option>
+                            <option value="year">Publication year</option>
+                            <option value="-rating">Highest rated</option>
+                            <option value="rating">Lowest rated</option>
+                        </select>
                         ${isAdmin() ? `
                             <button class="btn btn-primary w-25" id="add-book-btn" style="height: 100%; white-space: normal;">
                                 <i class="bi bi-plus-lg"></i> Add New Book
@@ -555,6 +588,13 @@ async function loadBooks(callback, setActive = true) {
 
         attachRateBookListeners(allBooks);
 
+        const sortSelect = document.getElementById('book-sort');
+        sortSelect.value = bookSort;
+        sortSelect.addEventListener('change', () => {
+            bookSort = sortSelect.value;
+            loadBooks();
+        });
+
         let searchTimeout;
         document.getElementById('book-search')?.addEventListener('input', async (e) => {
             const query = e.target.value.trim();
@@ -679,7 +719,7 @@ async function loadBooks(callback, setActive = true) {
 
 async function loadAuthors() {
     try {
-        const response = await fetch('/authors/');
+        const response = await fetch('/authors/?view=summary');
         authors = await response.json();
         console.log('Loaded authors:', authors);
         
@@ -825,7 +865,7 @@ async function loadAuthors() {
 
 async function loadAuthorsList() {
     try {
-        const response = await fetch('/authors/');
+        const response = await fetch('/authors/?view=summary');
         authors = await response.json();
     } catch (error) {
         console.error('Error loading authors list:', error);
@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+# Point the app at a throwaway database before anything imports database.py,
+# so test runs never touch (or depend on) the checked-in book_catalog.db.
+TEST_DB_DIR = tempfile.mkdtemp(prefix="book_catalog_tests_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from manage import migrate
+
+migrate()
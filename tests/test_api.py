@@ -1,6 +1,34 @@
+import csv
+import inspect
+import io
+import json
+import os
+import threading
+import time
 import pytest
+from contextlib import contextmanager
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
-from main import app
+from sqlalchemy import event, inspect as sqlalchemy_inspect
+from sqlalchemy.exc import OperationalError
+from database import Base, create_db_engine, engine, read_engine
+from main import app, create_app
+from manage import migrate, rebuild_ratings, upgrade_schema
+from migrations.helpers import include_object
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+import config
+from passwords import PasswordHasher
+from write_queue import WriteBehindQueue
+from routers import books
+import metrics
+from response_cache import FileCatalogVersion, ResponseCacheMiddleware, bump_catalog_version
+import serve
+from benchmarks.datagen import generate
+from benchmarks.suite import percentiles
+from cache import TTLCache
+from auth import SECRET_KEY, ALGORITHM
+from jose import jwt
 
 client = TestClient(app)
 
@@ -22,6 +50,27 @@ def get_token(username="Admin", password="testpassword", email="admin@example.co
     assert token
     return token
 
+@contextmanager
+def count_queries():
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    for db_engine in (engine, read_engine):
+        event.listen(db_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for db_engine in (engine, read_engine):
+            event.remove(db_engine, "before_cursor_execute", before_cursor_execute)
+
+def sql_for(method, url, **kwargs):
+    # Measure the handler, not a response cache hit.
+    bump_catalog_version()
+    with count_queries() as statements:
+        response = client.request(method, url, **kwargs)
+    assert response.status_code == 200, response.text
+    return statements
+
 def test_register_and_login():
     token = get_token()
     assert token
@@ -189,3 +238,1213 @@ def test_get_all_books_and_authors():
     assert response.status_code == 200
     response = client.get("/authors/")
     assert response.status_code == 200
+
+def test_book_listing_query_count_is_constant():
+    token = get_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.post("/authors/", json={
+        "name": "Query Count Author",
+        "biography": "For query count test"
+    }, headers=headers)
+    author_id = response.json()["id"]
+    book_ids = []
+    for i in range(5):
+        response = client.post("/books/", json={
+            "title": f"Query Count Book {i}",
+            "isbn": f"QC-{i}",
+            "publication_year": 2000 + i,
+            "description": "For query count test",
+            "author_ids": [author_id]
+        }, headers=headers)
+        book_id = response.json()["id"]
+        book_ids.append(book_id)
+        client.post(f"/books/{book_id}/rate", json={"rating": i}, headers=headers)
+
+    with count_queries() as small_page:
+        response = client.get("/books/?limit=1")
+    assert response.status_code == 200
+    with count_queries() as large_page:
+        response = client.get("/books/?limit=100")
+    assert response.status_code == 200
+    assert len(response.json()) >= 5
+    assert len(large_page) == len(small_page)
+
+    with count_queries() as narrow_search:
+        response = client.get("/books/search/Query Count QC 0")
+    assert [book["id"] for book in response.json()] == book_ids[:1]
+    with count_queries() as search_page:
+        response = client.get("/books/search/Query Count")
+    assert response.status_code == 200
+    ratings = {book["id"]: book["rating"] for book in response.json()}
+    assert [ratings[book_id] for book_id in book_ids] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert len(search_page) == len(narrow_search)
+
+    for book_id in book_ids:
+        client.delete(f"/books/{book_id}", headers=headers)
+    client.delete(f"/authors/{author_id}", headers=headers)
+
+def test_rating_counters_are_maintained_and_rebuildable():
+    admin_headers = {"Authorization": f"Bearer {get_token()}"}
+    user_headers = {"Authorization": f"Bearer {get_token('counteruser', 'testpassword', 'counteruser@example.com')}"}
+    response = client.post("/authors/", json={
+        "name": "Counter Author",
+        "biography": "For rating counter test"
+    }, headers=admin_headers)
+    author_id = response.json()["id"]
+    response = client.post("/books/", json={
+        "title": "Counter Book",
+        "isbn": "COUNTER-1",
+        "publication_year": 2024,
+        "description": "For rating counter test",
+        "author_ids": [author_id]
+    }, headers=admin_headers)
+    book_id = response.json()["id"]
+
+    client.post(f"/books/{book_id}/rate", json={"rating": 2}, headers=admin_headers)
+    client.post(f"/books/{book_id}/rate", json={"rating": 4}, headers=admin_headers)
+    response = client.post(f"/books/{book_id}/rate", json={"rating": 5}, headers=user_headers)
+    assert response.status_code == 200
+    assert response.json()["rating"] == 4.5
+    assert len(response.json()["user_ratings"]) == 2
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "UPDATE books SET rating_sum = 0, rating_count = 0, rating = 0 WHERE id = ?", (book_id,)
+        )
+        rebuild_ratings(conn)
+        row = conn.exec_driver_sql(
+            "SELECT rating_sum, rating_count, rating FROM books WHERE id = ?", (book_id,)
+        ).one()
+    assert tuple(row) == (9.0, 2, 4.5)
+
+    client.delete(f"/books/{book_id}", headers=admin_headers)
+    client.delete(f"/authors/{author_id}", headers=admin_headers)
+
+def test_full_text_search_prefix_ranking_and_paging():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    response = client.post("/authors/", json={
+        "name": "Zephyrine Quillfeather",
+        "biography": "Writes about lighthouses"
+    }, headers=headers)
+    author_id = response.json()["id"]
+    response = client.post("/books/", json={
+        "title": "Notes",
+        "isbn": "FTS-1",
+        "publication_year": 1999,
+        "description": "A story about a lighthouse keeper",
+        "author_ids": [author_id]
+    }, headers=headers)
+    description_hit = response.json()["id"]
+    response = client.post("/books/", json={
+        "title": "Lighthouse Keeper",
+        "isbn": "FTS-2",
+        "publication_year": 1999,
+        "description": "Memoir",
+        "author_ids": [author_id]
+    }, headers=headers)
+    title_hit = response.json()["id"]
+
+    response = client.get("/books/search/lightho keep")
+    assert response.status_code == 200
+    assert [book["id"] for book in response.json()] == [title_hit, description_hit]
+
+    response = client.get("/books/search/lightho keep?limit=1&offset=1")
+    assert [book["id"] for book in response.json()] == [description_hit]
+
+    client.put(f"/books/{title_hit}", json={
+        "title": "Harbour Memoir",
+        "isbn": "FTS-2",
+        "publication_year": 1999,
+        "description": "Memoir",
+        "author_ids": [author_id]
+    }, headers=headers)
+    response = client.get("/books/search/lighthouse")
+    assert [book["id"] for book in response.json()] == [description_hit]
+
+    response = client.get("/authors/search/zephyr")
+    assert [author["id"] for author in response.json()] == [author_id]
+    response = client.get("/authors/search/lighthouses")
+    assert [author["id"] for author in response.json()] == [author_id]
+
+    client.delete(f"/books/{description_hit}", headers=headers)
+    client.delete(f"/books/{title_hit}", headers=headers)
+    client.delete(f"/authors/{author_id}", headers=headers)
+    response = client.get("/books/search/lighthouse")
+    assert response.json() == []
+    response = client.get("/authors/search/zephyr")
+    assert response.json() == []
+
+def collect_pages(url, limit):
+    seen = []
+    response = client.get(f"{url}limit={limit}")
+    while True:
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= limit
+        seen.extend(page)
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            return seen
+        response = client.get(f"{url}limit={limit}&cursor={next_cursor}")
+
+def test_cursor_pagination_for_books_and_authors():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    author_ids = []
+    for name in ("Keyset Author B", "Keyset Author A"):
+        response = client.post("/authors/", json={"name": name}, headers=headers)
+        author_ids.append(response.json()["id"])
+    book_ids = []
+    for i, title in enumerate(["Keyset E", "Keyset C", "Keyset A", "Keyset D", "Keyset B"]):
+        response = client.post("/books/", json={
+            "title": title,
+            "isbn": f"KEYSET-{i}",
+            "publication_year": 2020,
+            "author_ids": author_ids
+        }, headers=headers)
+        book_ids.append(response.json()["id"])
+
+    by_id = collect_pages("/books/?", 2)
+    ids = [book["id"] for book in by_id]
+    assert ids == sorted(ids)
+    assert [i for i in ids if i in book_ids] == book_ids
+    assert all(len(book["authors"]) == 2 for book in by_id if book["id"] in book_ids)
+
+    by_title = collect_pages("/books/?sort=title&", 2)
+    titles = [book["title"] for book in by_title]
+    assert titles == sorted(titles)
+    assert [t for t in titles if t.startswith("Keyset")] == [
+        "Keyset A", "Keyset B", "Keyset C", "Keyset D", "Keyset E"
+    ]
+
+    authors = collect_pages("/authors/?sort=name&", 1)
+    names = [author["name"] for author in authors]
+    assert names == sorted(names)
+    assert [n for n in names if n.startswith("Keyset")] == ["Keyset Author A", "Keyset Author B"]
+
+    response = client.get("/books/?skip=1&limit=2")
+    assert [book["id"] for book in response.json()] == ids[1:3]
+
+    response = client.get("/books/?limit=1")
+    next_cursor = response.headers["X-Next-Cursor"]
+    assert client.get(f"/books/?sort=title&cursor={next_cursor}").status_code == 400
+    assert client.get("/books/?cursor=not-a-cursor").status_code == 400
+    assert client.get("/books/?sort=isbn").status_code == 400
+
+    for book_id in book_ids:
+        client.delete(f"/books/{book_id}", headers=headers)
+    for author_id in author_ids:
+        client.delete(f"/authors/{author_id}", headers=headers)
+
+READ_ENDPOINT_QUERY_BUDGETS = {
+    "/books/": 3,
+    "/books/{book_id}": 3,
+    "/books/search/Fanout": 4,
+    "/authors/": 2,
+    "/authors/?view=full": 2,
+    "/authors/{author_id}": 2,
+    "/authors/search/Fanout": 3,
+}
+
+def test_read_endpoint_sql_budgets():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    author_ids = []
+    for i in range(3):
+        response = client.post("/authors/", json={"name": f"Fanout Author {i}"}, headers=headers)
+        author_ids.append(response.json()["id"])
+    book_ids = []
+    for i in range(4):
+        response = client.post("/books/", json={
+            "title": f"Fanout Book {i}",
+            "isbn": f"FANOUT-{i}",
+            "publication_year": 2021,
+            "author_ids": author_ids
+        }, headers=headers)
+        book_ids.append(response.json()["id"])
+        client.post(f"/books/{book_ids[-1]}/rate", json={"rating": 3}, headers=headers)
+
+    report = {}
+    for template, budget in READ_ENDPOINT_QUERY_BUDGETS.items():
+        url = template.format(book_id=book_ids[0], author_id=author_ids[0])
+        statements = sql_for("GET", url)
+        report[template] = statements
+        assert len(statements) <= budget, "\n\n".join([url] + statements)
+    # Relations are loaded with selectin queries, never by joined eager
+    # loading that multiplies rows (book -> authors -> books ...).
+    for statements in report.values():
+        for statement in statements:
+            assert "LEFT OUTER JOIN" not in statement, statement
+
+    for book_id in book_ids:
+        client.delete(f"/books/{book_id}", headers=headers)
+    for author_id in author_ids:
+        client.delete(f"/authors/{author_id}", headers=headers)
+
+def test_async_routers_serve_hot_paths():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    response = client.post("/authors/", json={"name": "Async Author"}, headers=headers)
+    author_id = response.json()["id"]
+    response = client.post("/books/", json={
+        "title": "Async Book",
+        "isbn": "ASYNC-1",
+        "publication_year": 2022,
+        "author_ids": [author_id]
+    }, headers=headers)
+    book_id = response.json()["id"]
+
+    async_app = create_app(use_async_db=True)
+    for path, method in (("/books/", "GET"), ("/books/{book_id:int}", "GET"), ("/auth/token", "POST")):
+        route = next(r for r in async_app.routes if getattr(r, "path", None) == path and method in r.methods)
+        assert inspect.iscoroutinefunction(route.endpoint)
+
+    with TestClient(async_app) as async_client:
+        response = async_client.post("/auth/token", data={"username": "Admin", "password": "testpassword"})
+        assert response.status_code == 200
+        async_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = async_client.post("/auth/token", data={"username": "Admin", "password": "wrong"})
+        assert response.status_code == 401
+
+        response = async_client.get("/books/?limit=1000")
+        assert response.status_code == 200
+        assert book_id in [book["id"] for book in response.json()]
+        response = async_client.get(f"/books/{book_id}")
+        assert response.json()["authors"][0]["id"] == author_id
+        assert async_client.get("/books/999999").status_code == 404
+        response = async_client.get("/books/search/async")
+        assert [book["id"] for book in response.json()] == [book_id]
+        response = async_client.get(f"/authors/{author_id}")
+        assert response.json()["books"][0]["id"] == book_id
+        response = async_client.get("/authors/search/async")
+        assert [author["id"] for author in response.json()] == [author_id]
+
+        response = async_client.post(f"/books/{book_id}/rate", json={"rating": 4}, headers=async_headers)
+        assert response.status_code == 200
+        assert response.json()["rating"] == 4.0
+        assert async_client.post(f"/books/{book_id}/rate", json={"rating": 9}, headers=async_headers).status_code == 400
+
+        # Routes without an async twin fall through to the sync router.
+        response = async_client.delete(f"/books/{book_id}", headers=async_headers)
+        assert response.status_code == 200
+    client.delete(f"/authors/{author_id}", headers=headers)
+
+class BlockingContext:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def verify(self, plain_password, hashed_password):
+        self.release.wait(5)
+        return plain_password == hashed_password
+
+    def hash(self, password):
+        return password
+
+def test_password_hasher_applies_backpressure():
+    context = BlockingContext()
+    hasher = PasswordHasher(context, max_workers=1, max_pending=2)
+    results = []
+    workers = [
+        threading.Thread(target=lambda: results.append(hasher.verify_sync("pw", "pw")))
+        for _ in range(2)
+    ]
+    for worker in workers:
+        worker.start()
+    deadline = time.time() + 5
+    while (hasher.stats()["in_flight"], hasher.stats()["queue_depth"]) != (1, 1):
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+    with pytest.raises(HTTPException) as excinfo:
+        hasher.verify_sync("pw", "pw")
+    assert excinfo.value.status_code == 503
+
+    context.release.set()
+    for worker in workers:
+        worker.join()
+    stats = hasher.stats()
+    assert results == [True, True]
+    assert (stats["completed"], stats["rejected"], stats["queue_depth"], stats["in_flight"]) == (2, 1, 0, 0)
+    assert hasher.hash_sync("secret") == "secret"
+
+def test_login_still_verifies_through_hash_pool():
+    get_token("poolcheck", "rightpassword", "poolcheck@example.com")
+    response = client.post("/auth/token", data={"username": "poolcheck", "password": "nope"})
+    assert response.status_code == 401
+
+def test_token_claims_and_cached_user_resolution():
+    admin_headers = {"Authorization": f"Bearer {get_token()}"}
+    token = get_token("cacheduser", "testpassword", "cacheduser@example.com")
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    assert claims["sub"] == "cacheduser"
+    assert claims["role"] == "user"
+    user_id = claims["uid"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.post("/authors/", json={"name": "Cache Author"}, headers=admin_headers)
+    author_id = response.json()["id"]
+    response = client.post("/books/", json={
+        "title": "Cache Book",
+        "isbn": "CACHE-1",
+        "publication_year": 2023,
+        "author_ids": [author_id]
+    }, headers=admin_headers)
+    book_id = response.json()["id"]
+
+    client.post(f"/books/{book_id}/rate", json={"rating": 3}, headers=headers)
+    with count_queries() as statements:
+        response = client.post(f"/books/{book_id}/rate", json={"rating": 4}, headers=headers)
+    assert response.status_code == 200
+    assert not any("FROM users" in statement for statement in statements)
+
+    client.post(f"/books/{book_id}/rate", json={"rating": 2}, headers=admin_headers)
+    response = client.delete(f"/auth/users/{user_id}", headers=admin_headers)
+    assert response.status_code == 200
+    response = client.post(f"/books/{book_id}/rate", json={"rating": 5}, headers=headers)
+    assert response.status_code == 401
+
+    # The deleted user's vote is gone from the book and its counters.
+    response = client.get(f"/books/{book_id}")
+    assert response.status_code == 200
+    assert [rating["rating"] for rating in response.json()["user_ratings"]] == [2.0]
+    assert response.json()["rating"] == 2.0
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql(
+            "SELECT rating_sum, rating_count FROM books WHERE id = ?", (book_id,)
+        ).one() == (2.0, 1)
+        assert conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM user_ratings WHERE user_id IS NULL OR user_id = ?", (user_id,)
+        ).scalar() == 0
+
+    client.delete(f"/books/{book_id}", headers=admin_headers)
+    client.delete(f"/authors/{author_id}", headers=admin_headers)
+
+def test_ttl_cache_expires_and_evicts():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    now[0] = 10.0
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+def test_sqlite_connections_are_tuned():
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+        assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 0
+    with read_engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 1
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql("DELETE FROM books WHERE id = -1")
+
+def test_bulk_import_and_streaming_export():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    authors_csv = 'name,biography\nBulk Author One,"Line one\nline two"\nBulk Author Two,\nToo,many,columns\n'
+    response = client.post(
+        "/authors/bulk", content=authors_csv,
+        headers=dict(headers, **{"Content-Type": "text/csv"})
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["processed"], report["created"], report["updated"]) == (3, 2, 0)
+    assert [error["line"] for error in report["errors"]] == [5]
+    response = client.get("/authors/search/bulk author")
+    authors = {author["name"]: author for author in response.json()}
+    assert authors["Bulk Author One"]["biography"] == "Line one\nline two"
+    first_id = authors["Bulk Author One"]["id"]
+    second_id = authors["Bulk Author Two"]["id"]
+
+    lines = [
+        {"title": "Bulk A", "isbn": "BULK-A", "publication_year": 2001, "author_ids": [first_id]},
+        {"title": "Bulk B", "isbn": "BULK-B", "publication_year": 2002, "author_ids": [first_id, second_id]},
+        {"title": "Bulk C", "isbn": "BULK-C", "publication_year": "not a year", "author_ids": []},
+        {"title": "Bulk D", "isbn": "BULK-D", "publication_year": 2004, "author_ids": [999999]},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\n{not json\n"
+    response = client.post(
+        "/books/bulk?batch_size=2", content=body,
+        headers=dict(headers, **{"Content-Type": "application/x-ndjson"})
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["processed"], report["created"], report["updated"]) == (5, 2, 0)
+    assert [error["line"] for error in report["errors"]] == [3, 4, 5]
+
+    update = {"title": "Bulk A Revised", "isbn": "BULK-A", "publication_year": 2001, "author_ids": [second_id]}
+    response = client.post("/books/bulk", content=json.dumps(update), headers=headers)
+    assert (response.json()["created"], response.json()["updated"]) == (0, 1)
+    response = client.get("/books/search/revised")
+    assert [author["id"] for author in response.json()[0]["authors"]] == [second_id]
+
+    response = client.post("/books/bulk", content="x", headers=dict(headers, **{"Content-Type": "application/xml"}))
+    assert response.status_code == 415
+
+    response = client.get("/books/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    exported = {row["isbn"]: row for row in map(json.loads, response.text.splitlines())}
+    assert exported["BULK-A"]["title"] == "Bulk A Revised"
+    assert exported["BULK-B"]["author_ids"] == sorted([first_id, second_id])
+
+    response = client.get("/books/export?format=csv")
+    rows = {row["isbn"]: row for row in csv.DictReader(io.StringIO(response.text))}
+    assert rows["BULK-B"]["author_ids"] == ";".join(map(str, sorted([first_id, second_id])))
+    assert client.get("/books/export?format=xml").status_code == 400
+
+    for row in exported.values():
+        if row["isbn"].startswith("BULK-"):
+            client.delete(f"/books/{row['id']}", headers=headers)
+    client.delete(f"/authors/{first_id}", headers=headers)
+    client.delete(f"/authors/{second_id}", headers=headers)
+
+def create_author_with_books(headers, name, book_count):
+    author_id = client.post("/authors/", json={"name": name}, headers=headers).json()["id"]
+    book_ids = []
+    for i in range(book_count):
+        response = client.post("/books/", json={
+            "title": f"{name} Book {i}",
+            "isbn": f"{name}-{i}",
+            "publication_year": 2010,
+            "author_ids": [author_id]
+        }, headers=headers)
+        book_ids.append(response.json()["id"])
+    return author_id, book_ids
+
+def test_delete_author_removes_orphans_in_one_transaction():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    co_author_id = client.post("/authors/", json={"name": "Co Author"}, headers=headers).json()["id"]
+    author_id, book_ids = create_author_with_books(headers, "Prolific", 5)
+    shared_id = book_ids[0]
+    client.put(f"/books/{shared_id}", json={
+        "title": "Prolific Book 0",
+        "isbn": "Prolific-0",
+        "publication_year": 2010,
+        "author_ids": [author_id, co_author_id]
+    }, headers=headers)
+    client.post(f"/books/{book_ids[1]}/rate", json={"rating": 5}, headers=headers)
+
+    with count_queries() as statements:
+        response = client.delete(f"/authors/{author_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["deleted_books"] == [f"Prolific Book {i}" for i in range(1, 5)]
+
+    single_author_id, _ = create_author_with_books(headers, "Occasional", 1)
+    with count_queries() as single_book_statements:
+        client.delete(f"/authors/{single_author_id}", headers=headers)
+    assert len(statements) == len(single_book_statements)
+
+    assert client.get(f"/authors/{author_id}").status_code == 404
+    for book_id in book_ids[1:]:
+        assert client.get(f"/books/{book_id}").status_code == 404
+    response = client.get(f"/books/{shared_id}")
+    assert [author["id"] for author in response.json()["authors"]] == [co_author_id]
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM user_ratings WHERE book_id = ?", (book_ids[1],)
+        ).scalar() == 0
+
+    client.delete(f"/authors/{co_author_id}", headers=headers)
+    assert client.get(f"/books/{shared_id}").status_code == 404
+
+def test_catalog_reads_are_cached_with_etags():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    author_id = client.post("/authors/", json={"name": "Cached Author"}, headers=headers).json()["id"]
+    book_id = client.post("/books/", json={
+        "title": "Cached Book",
+        "isbn": "CACHE-1",
+        "publication_year": 2020,
+        "author_ids": [author_id]
+    }, headers=headers).json()["id"]
+
+    first = client.get(f"/books/{book_id}")
+    etag = first.headers["ETag"]
+    assert "must-revalidate" in first.headers["Cache-Control"]
+    with count_queries() as statements:
+        hit = client.get(f"/books/{book_id}")
+        not_modified = client.get(f"/books/{book_id}", headers={"If-None-Match": etag})
+    assert statements == []
+    assert hit.content == first.content
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+    # Any write invalidates, and the ETag follows the body.
+    client.post(f"/books/{book_id}/rate", json={"rating": 4}, headers=headers)
+    response = client.get(f"/books/{book_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["rating"] == 4
+    assert response.headers["ETag"] != etag
+
+    listing = client.get("/authors/")
+    client.put(f"/authors/{author_id}", json={"name": "Renamed Author"}, headers=headers)
+    response = client.get("/authors/", headers={"If-None-Match": listing.headers["ETag"]})
+    assert response.status_code == 200
+    assert "Renamed Author" in [author["name"] for author in response.json()]
+
+    # An unrelated write still revalidates to 304 when the page is unchanged.
+    etag = client.get(f"/books/{book_id}").headers["ETag"]
+    other_id = client.post("/authors/", json={"name": "Unrelated"}, headers=headers).json()["id"]
+    assert client.get(f"/books/{book_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    assert "ETag" not in client.get("/books/export").headers
+    assert "ETag" not in client.get("/books/999999").headers
+
+    client.delete(f"/authors/{other_id}", headers=headers)
+    client.delete(f"/authors/{author_id}", headers=headers)
+    assert client.get(f"/books/{book_id}").status_code == 404
+
+def test_response_cache_backend_is_pluggable():
+    class DictBackend(dict):
+        def set(self, key, value):
+            self[key] = value
+
+    backend = DictBackend()
+    with TestClient(create_app(response_cache=backend)) as cached_client:
+        cached_client.get("/books/")
+        cached_client.get("/auth/users")
+    assert [key.split(":", 1)[1] for key in backend] == ["/books/?"]
+
+def test_book_summary_view_is_compact():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    author_id = client.post("/authors/", json={"name": "Summary Author"}, headers=headers).json()["id"]
+    book_ids = [
+        client.post("/books/", json={
+            "title": f"Summary Book {i}",
+            "isbn": f"SUMMARY-{i}",
+            "publication_year": 2001,
+            "description": "A long description " * 50,
+            "author_ids": [author_id]
+        }, headers=headers).json()["id"]
+        for i in range(3)
+    ]
+    client.post(f"/books/{book_ids[0]}/rate", json={"rating": 3}, headers=headers)
+
+    statements = sql_for("GET", "/books/?view=summary&limit=1000")
+    assert not any("user_ratings" in statement for statement in statements)
+    assert len(statements) == 2
+
+    summaries = {book["id"]: book for book in client.get("/books/?view=summary&limit=1000").json()}
+    assert summaries[book_ids[0]] == {
+        "id": book_ids[0],
+        "title": "Summary Book 0",
+        "isbn": "SUMMARY-0",
+        "publication_year": 2001,
+        "rating": 3.0,
+        "rating_count": 1,
+        "authors": [{"id": author_id, "name": "Summary Author"}],
+    }
+    assert summaries[book_ids[1]]["rating_count"] == 0
+
+    full = {book["id"]: book for book in client.get("/books/?limit=1000").json()}
+    assert len(full[book_ids[0]]["user_ratings"]) == 1
+    assert full[book_ids[0]]["description"].startswith("A long description")
+    assert collect_pages("/books/?view=summary&", 2) == list(summaries.values())
+    assert client.get("/books/?view=everything").status_code == 422
+
+    with TestClient(create_app(use_async_db=True)) as async_client:
+        response = async_client.get("/books/?view=summary&limit=1000")
+    assert response.json() == list(summaries.values())
+
+    client.delete(f"/authors/{author_id}", headers=headers)
+
+def normalised(payload):
+    # Child lists are unordered in the ORM path.
+    if isinstance(payload, list):
+        return [normalised(item) for item in payload]
+    return {
+        key: sorted(value, key=lambda child: child["id"]) if isinstance(value, list) else value
+        for key, value in payload.items()
+    }
+
+def test_fast_json_path_matches_pydantic_output(monkeypatch):
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    author_ids = [
+        client.post("/authors/", json={"name": f"Fastpath Author {i}", "biography": "Bio"}, headers=headers).json()["id"]
+        for i in range(2)
+    ]
+    book_ids = [
+        client.post("/books/", json={
+            "title": f"Fastpath Book {i}",
+            "isbn": f"FASTPATH-{i}",
+            "publication_year": 1999,
+            "description": None if i else "Described",
+            "author_ids": author_ids[:i + 1]
+        }, headers=headers).json()["id"]
+        for i in range(2)
+    ]
+    client.post(f"/books/{book_ids[0]}/rate", json={"rating": 4.5}, headers=headers)
+
+    urls = [
+        "/books/?limit=1000", "/books/?limit=1&sort=title", "/books/?view=summary&limit=1000",
+        f"/books/{book_ids[0]}", "/books/search/fastpath",
+        "/authors/?limit=1000", "/authors/?view=full&limit=1000",
+        f"/authors/{author_ids[0]}", "/authors/search/fastpath",
+        "/books/999999", "/authors/999999", "/books/?sort=bogus",
+    ]
+
+    def responses():
+        bump_catalog_version()
+        return [client.get(url) for url in urls]
+
+    slow = responses()
+    monkeypatch.setattr(config, "FAST_JSON_RESPONSES", True)
+    fast = responses()
+    for url, expected, actual in zip(urls, slow, fast):
+        assert actual.status_code == expected.status_code, url
+        assert normalised(actual.json()) == normalised(expected.json()), url
+        assert actual.headers.get("X-Next-Cursor") == expected.headers.get("X-Next-Cursor"), url
+
+    with TestClient(create_app(use_async_db=True)) as async_client:
+        for url, expected in zip(urls, slow):
+            assert normalised(async_client.get(url).json()) == normalised(expected.json()), url
+
+    for author_id in author_ids:
+        client.delete(f"/authors/{author_id}", headers=headers)
+
+def query_plan(sql, params=()):
+    with engine.connect() as conn:
+        return " ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params))
+
+def test_rating_and_association_lookups_use_indexes():
+    assert "USING COVERING INDEX ix_user_ratings_user_id_book_id" in query_plan(
+        "SELECT id FROM user_ratings WHERE user_id = ? AND book_id = ?", (1, 1)
+    )
+    assert "ix_user_ratings_book_id" in query_plan(
+        "SELECT SUM(rating) FROM user_ratings WHERE book_id = ?", (1,)
+    )
+    assert "ix_book_author_author_id" in query_plan(
+        "SELECT book_id FROM book_author WHERE author_id = ?", (1,)
+    )
+    assert "SCAN" not in query_plan("SELECT author_id FROM book_author WHERE book_id = ?", (1,))
+
+def test_rating_is_a_single_upsert():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    author_id = client.post("/authors/", json={"name": "Upsert Author"}, headers=headers).json()["id"]
+    book_id = client.post("/books/", json={
+        "title": "Upsert Book",
+        "isbn": "UPSERT-1",
+        "publication_year": 2015,
+        "author_ids": [author_id]
+    }, headers=headers).json()["id"]
+
+    statements = sql_for("POST", f"/books/{book_id}/rate", json={"rating": 2}, headers=headers)
+    assert sum("ON CONFLICT" in statement for statement in statements) == 1
+    assert not any(statement.startswith("DELETE") for statement in statements)
+    response = client.post(f"/books/{book_id}/rate", json={"rating": 5}, headers=headers)
+    assert response.json()["rating"] == 5
+    assert len(response.json()["user_ratings"]) == 1
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql(
+            "SELECT rating_sum, rating_count FROM books WHERE id = ?", (book_id,)
+        ).one() == (5.0, 1)
+
+    client.delete(f"/authors/{author_id}", headers=headers)
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE books (id INTEGER NOT NULL PRIMARY KEY, title VARCHAR, isbn VARCHAR UNIQUE, "
+    "publication_year INTEGER, rating FLOAT, description VARCHAR)",
+    "CREATE TABLE authors (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR, biography VARCHAR)",
+    "CREATE TABLE users (id INTEGER NOT NULL PRIMARY KEY, username VARCHAR UNIQUE, email VARCHAR UNIQUE, "
+    "hashed_password VARCHAR, is_active INTEGER)",
+    "CREATE TABLE book_author (book_id INTEGER REFERENCES books (id), "
+    "author_id INTEGER REFERENCES authors (id))",
+    "CREATE TABLE user_ratings (id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER REFERENCES users (id), "
+    "book_id INTEGER REFERENCES books (id), rating FLOAT)",
+    "INSERT INTO books (id, title, isbn, publication_year, rating) VALUES (1, 'Old', 'OLD-1', 1990, 0)",
+    "INSERT INTO authors (id, name) VALUES (1, 'Old Author')",
+    "INSERT INTO book_author VALUES (1, 1), (1, 1), (1, NULL)",
+    "INSERT INTO user_ratings (user_id, book_id, rating) VALUES (1, 1, 1), (1, 1, 4), (2, 1, 2)",
+]
+
+def test_upgrade_schema_migrates_a_legacy_database(tmp_path):
+    legacy_engine = create_db_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy_engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.exec_driver_sql(statement)
+    for _ in range(2):
+        with legacy_engine.begin() as conn:
+            upgrade_schema(conn)
+
+    with legacy_engine.connect() as conn:
+        db_inspector = sqlalchemy_inspect(conn)
+        assert db_inspector.get_pk_constraint("book_author")["constrained_columns"] == ["book_id", "author_id"]
+        assert {index["name"] for index in db_inspector.get_indexes("user_ratings")} >= {
+            "ix_user_ratings_user_id_book_id", "ix_user_ratings_book_id"
+        }
+        assert conn.exec_driver_sql("SELECT * FROM book_author").all() == [(1, 1)]
+        assert conn.exec_driver_sql(
+            "SELECT user_id, rating FROM user_ratings ORDER BY user_id"
+        ).all() == [(1, 4.0), (2, 2.0)]
+        assert conn.exec_driver_sql(
+            "SELECT rating_sum, rating_count, rating FROM books"
+        ).one() == (6.0, 2, 3.0)
+    legacy_engine.dispose()
+
+def schema_diff(db_engine):
+    with db_engine.connect() as conn:
+        context = MigrationContext.configure(conn, opts={"include_object": include_object})
+        return compare_metadata(context, Base.metadata)
+
+def test_migrations_build_the_model_schema(tmp_path):
+    fresh_engine = create_db_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert migrate(bind=fresh_engine) == "0003"
+    assert schema_diff(fresh_engine) == []
+    with fresh_engine.connect() as conn:
+        assert conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name IN ('books_fts', 'authors_fts')"
+        ).scalar() == 2
+    migrate("base", bind=fresh_engine)
+    assert migrate(bind=fresh_engine) == "0003"
+
+    # Existing databases without alembic_version are adopted, not recreated.
+    legacy_engine = create_db_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy_engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.exec_driver_sql(statement)
+    assert migrate(bind=legacy_engine) == "0003"
+    assert schema_diff(legacy_engine) == []
+    with legacy_engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT title, rating FROM books").one() == ("Old", 3.0)
+        assert conn.exec_driver_sql(
+            "SELECT rowid FROM books_fts WHERE books_fts MATCH 'old'"
+        ).scalar() == 1
+    fresh_engine.dispose()
+    legacy_engine.dispose()
+
+def test_file_catalog_version_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "catalog.version")
+    worker_a, worker_b = FileCatalogVersion(path), FileCatalogVersion(path)
+    seen = {worker_a.value}
+    assert worker_b.value == worker_a.value
+    for _ in range(3):
+        worker_a.bump()
+        assert worker_b.value == worker_a.value
+        assert worker_b.value not in seen
+        seen.add(worker_b.value)
+
+    # One worker's write invalidates the other's cached pages.
+    clients = [
+        TestClient(ResponseCacheMiddleware(app, TTLCache(), version=version))
+        for version in (worker_a, worker_b)
+    ]
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    author_id = client.post("/authors/", json={"name": "Shared Version"}, headers=headers).json()["id"]
+    for worker_client in clients:
+        assert worker_client.get(f"/authors/{author_id}").json()["name"] == "Shared Version"
+    client.put(f"/authors/{author_id}", json={"name": "Renamed Shared"}, headers=headers)
+    worker_a.bump()
+    for worker_client in clients:
+        assert worker_client.get(f"/authors/{author_id}").json()["name"] == "Renamed Shared"
+    client.delete(f"/authors/{author_id}", headers=headers)
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_workers_do_not_inherit_sqlite_connections():
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+    assert engine.pool.checkedin() > 0
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if engine.pool.checkedin() == 0 and read_engine.pool.checkedin() == 0 else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert engine.pool.checkedin() > 0
+
+def test_serve_settings(monkeypatch):
+    monkeypatch.setattr(config, "DATABASE_URL", "sqlite:///./catalog.db")
+    assert serve.default_version_file() == os.path.abspath("./catalog.db") + ".version"
+    monkeypatch.setattr(config, "DATABASE_URL", "postgresql://db/catalog")
+    assert serve.default_version_file() == ""
+
+    options = serve.gunicorn_options(serve.argparse.Namespace(workers=3, host="127.0.0.1", port=9000))
+    assert options["bind"] == "127.0.0.1:9000"
+    assert options["workers"] == 3
+    assert options["preload_app"] is False
+
+def test_benchmark_data_generator(tmp_path):
+    bench_engine = create_db_engine(f"sqlite:///{tmp_path / 'bench.db'}")
+    migrate(bind=bench_engine)
+    dataset = generate(bench_engine, authors=5, books=40, ratings=100)
+    assert dataset == {"authors": 5, "books": 40, "ratings": 100, "users": 5}
+    with bench_engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM user_ratings").scalar() == 100
+        assert conn.exec_driver_sql("SELECT SUM(rating_count) FROM books").scalar() == 100
+        assert conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM books WHERE id NOT IN (SELECT book_id FROM book_author)"
+        ).scalar() == 0
+    bench_engine.dispose()
+    assert percentiles([float(i) for i in range(1, 101)]) == pytest.approx(
+        {"p50": 50.5, "p95": 95.05, "p99": 99.01}
+    )
+
+def metric_value(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_requests_are_timed_and_exported_as_metrics(caplog):
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    author_id, (book_id,) = create_author_with_books(headers, "Metrics Author", 1)
+    route = 'method="GET",route="/books/{book_id}"'
+    before = metric_value(client.get("/metrics").text, f'http_requests_total{{{route},status="200"}}')
+
+    bump_catalog_version()
+    response = client.get(f"/books/{book_id}")
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("app;dur=") and "db;dur=" in timing
+    queries = int(timing.split('desc="')[1].split(" ")[0])
+    assert queries >= 1
+
+    # The second read is a response cache hit and runs no SQL.
+    cached = client.get(f"/books/{book_id}")
+    assert 'desc="0 queries"' in cached.headers["Server-Timing"]
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert metric_value(text, f'http_requests_total{{{route},status="200"}}') == before + 1
+    assert metric_value(text, f'http_request_duration_seconds_count{{{route}}}') >= 1
+    assert metric_value(text, f'db_queries_per_request_bucket{{{route},le="+Inf"}}') >= 1
+    assert metric_value(text, 'http_requests_total{method="GET",route="response_cache",status="200"}') >= 1
+    assert "password_hasher_completed " in text
+    assert "/metrics" not in client.get("/openapi.json").json()["paths"]
+
+    # Slow requests and query-heavy ones are logged as warnings.
+    middleware = metrics.MetricsMiddleware(app, slow_request_ms=0, query_warning=1000, sample_rate=0)
+    scope = {"type": "http", "method": "GET", "path": "/books/1"}
+    with caplog.at_level("INFO", logger="book_catalog.requests"):
+        middleware.record(scope, 200, 0.01, {"queries": 3, "db_seconds": 0.002})
+        middleware.query_warning, middleware.slow_request_ms = 2, 1000
+        middleware.record(scope, 200, 0.01, {"queries": 3, "db_seconds": 0.002})
+        middleware.query_warning = 1000
+        middleware.record(scope, 200, 0.01, {"queries": 3, "db_seconds": 0.002})
+    assert [record.levelname for record in caplog.records] == ["WARNING", "WARNING"]
+    assert "Slow request" in caplog.records[0].getMessage()
+    assert "Many queries" in caplog.records[1].getMessage()
+
+    client.delete(f"/authors/{author_id}", headers=headers)
+
+def test_top_books_leaderboard(monkeypatch, tmp_path):
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    voters = [
+        {"Authorization": f"Bearer {get_token(f'voter{i}', email=f'voter{i}@example.com')}"}
+        for i in range(3)
+    ]
+    author_id = client.post("/authors/", json={"name": "Leaderboard Author"}, headers=headers).json()["id"]
+    book_ids = [
+        client.post("/books/", json={
+            "title": f"Leaderboard {i}",
+            "isbn": f"LEADER-{i}",
+            "publication_year": year,
+            "author_ids": [author_id]
+        }, headers=headers).json()["id"]
+        for i, year in enumerate((1777, 1777, 1778, 1777))
+    ]
+    one_vote, many_votes, other_year, unrated = book_ids
+    client.post(f"/books/{one_vote}/rate", json={"rating": 5}, headers=voters[0])
+    for voter, rating in zip(voters, (5, 5, 4)):
+        client.post(f"/books/{many_votes}/rate", json={"rating": rating}, headers=voter)
+    client.post(f"/books/{other_year}/rate", json={"rating": 1}, headers=voters[0])
+    # Re-rating replaces the vote rather than adding one.
+    client.post(f"/books/{one_vote}/rate", json={"rating": 4}, headers=voters[0])
+
+    monkeypatch.setattr(config, "LEADERBOARD_MIN_VOTES", 10)
+    monkeypatch.setattr(config, "LEADERBOARD_PRIOR_MEAN", 3.0)
+    response = client.get("/books/top?year=1777")
+    assert response.status_code == 200
+    top = response.json()
+    assert [book["id"] for book in top] == [many_votes, one_vote]
+    assert top[0]["score"] == pytest.approx((14 + 30) / 13)
+    assert top[1]["score"] == pytest.approx((4 + 30) / 11)
+    assert top[0]["rating_count"] == 3
+    assert top[0]["authors"] == [{"id": author_id, "name": "Leaderboard Author"}]
+    assert [book["id"] for book in client.get("/books/top?year=1778").json()] == [other_year]
+    overall = [book["id"] for book in client.get("/books/top?limit=100").json()]
+    assert unrated not in overall
+    assert overall.index(many_votes) < overall.index(one_vote) < overall.index(other_year)
+    assert client.get("/books/top?limit=0").status_code == 422
+    with TestClient(create_app(use_async_db=True)) as async_client:
+        assert async_client.get("/books/top?year=1777").json() == top
+
+    # Top-K walks an index in order: no scan of books, no sort.
+    for sql, index in (
+        ("SELECT id FROM books WHERE score IS NOT NULL ORDER BY score DESC, id DESC LIMIT 10",
+         "ix_books_score"),
+        ("SELECT id FROM books WHERE score IS NOT NULL AND publication_year = 1777 "
+         "ORDER BY score DESC, id DESC LIMIT 10", "ix_books_publication_year_score"),
+    ):
+        plan = query_plan(sql)
+        assert index in plan and "TEMP B-TREE" not in plan
+
+    # Migrating a 0001 database backfills scores for books rated before it.
+    old_engine = create_db_engine(f"sqlite:///{tmp_path / 'scores.db'}")
+    migrate("0001", bind=old_engine)
+    with old_engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO books (id, title, isbn, publication_year, rating_sum, rating_count) "
+            "VALUES (1, 'Rated', 'R-1', 2000, 9, 2), (2, 'Unrated', 'R-2', 2000, 0, 0)"
+        )
+    assert migrate(bind=old_engine) == "0003"
+    with old_engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT score FROM books ORDER BY id").scalars().all() == [
+            pytest.approx((9 + 30) / 12), None
+        ]
+    old_engine.dispose()
+
+    client.delete(f"/authors/{author_id}", headers=headers)
+
+def test_batch_rating_is_one_transaction():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    voter = {"Authorization": f"Bearer {get_token('batchvoter', email='batchvoter@example.com')}"}
+    author_id, book_ids = create_author_with_books(headers, "Batch Rating Author", 3)
+    client.post(f"/books/{book_ids[0]}/rate", json={"rating": 1}, headers=voter)
+    client.post(f"/books/{book_ids[0]}/rate", json={"rating": 3}, headers=headers)
+
+    batch = {"ratings": [
+        {"book_id": book_ids[0], "rating": 5},
+        {"book_id": book_ids[1], "rating": 2},
+        {"book_id": book_ids[2], "rating": 1},
+        {"book_id": book_ids[2], "rating": 4},
+    ]}
+    statements = sql_for("POST", "/books/ratings:batch", json=batch, headers=voter)
+    assert sum(statement.startswith("UPDATE books") for statement in statements) == 1
+    assert sum("ON CONFLICT" in statement for statement in statements) == 1
+
+    response = client.post("/books/ratings:batch", json=batch, headers=voter)
+    assert response.status_code == 200
+    assert response.json() == {"saved": 3, "books": [
+        {"id": book_ids[0], "rating": 4.0, "rating_count": 2},
+        {"id": book_ids[1], "rating": 2.0, "rating_count": 1},
+        {"id": book_ids[2], "rating": 4.0, "rating_count": 1},
+    ]}
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM user_ratings WHERE book_id IN (?, ?, ?)", tuple(book_ids)
+        ).scalar() == 4
+
+    # Validation covers the whole batch before anything is written.
+    for bad_batch, status_code in (
+        ({"ratings": []}, 422),
+        ({"ratings": [{"book_id": book_ids[1], "rating": 5}, {"book_id": book_ids[2], "rating": 6}]}, 422),
+        ({"ratings": [{"book_id": book_ids[1], "rating": 5}, {"book_id": 999999, "rating": 5}]}, 404),
+    ):
+        response = client.post("/books/ratings:batch", json=bad_batch, headers=voter)
+        assert response.status_code == status_code
+    assert "999999" in response.json()["detail"]
+    assert client.get(f"/books/{book_ids[1]}").json()["rating"] == 2.0
+    assert client.post("/books/ratings:batch", json=batch).status_code == 401
+
+    with TestClient(create_app(use_async_db=True)) as async_client:
+        response = async_client.post("/books/ratings:batch", json={"ratings": [
+            {"book_id": book_ids[1], "rating": 3}
+        ]}, headers=voter)
+        assert response.json()["books"] == [{"id": book_ids[1], "rating": 3.0, "rating_count": 1}]
+
+    client.delete(f"/authors/{author_id}", headers=headers)
+
+def test_write_behind_queue_groups_commits_and_pushes_back():
+    batches = []
+    class FakeSession:
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc_info):
+            return False
+    write_queue = WriteBehindQueue(
+        "test", FakeSession, lambda db, items: batches.append(items),
+        max_size=5, max_batch=3, interval_ms=50
+    )
+    for item in range(5):
+        write_queue.put(item)
+    with pytest.raises(HTTPException) as exc_info:
+        write_queue.put(5)
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "1"
+
+    write_queue.start()
+    write_queue.stop()
+    assert batches == [[0, 1, 2], [3, 4]]
+    assert write_queue.stats() == {
+        "queue_depth": 0, "max_size": 5, "accepted": 5, "rejected": 1,
+        "written": 5, "failed": 0, "batches": 2,
+    }
+
+def test_write_behind_ratings_are_flushed_on_shutdown(monkeypatch):
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    author_id, book_ids = create_author_with_books(headers, "Queued Rating Author", 2)
+    monkeypatch.setattr(config, "RATING_WRITE_BEHIND", True)
+    with TestClient(create_app()) as queued_client:
+        for book_id, rating in ((book_ids[0], 2), (book_ids[0], 4), (book_ids[1], 5)):
+            response = queued_client.post(f"/books/{book_id}/rate", json={"rating": rating}, headers=headers)
+            assert response.status_code == 202
+            assert response.json() == {"message": "Rating accepted", "book_id": book_id, "rating": rating}
+        assert queued_client.post("/books/999999/rate", json={"rating": 1}, headers=headers).status_code == 404
+        metrics_text = queued_client.get("/metrics").text
+        assert "rating_queue_accepted " in metrics_text
+    assert not books.rating_queue.running
+    assert 'write_queue_lag_seconds_count{queue="ratings"}' in metrics.render_metrics()
+
+    assert [(book["id"], book["rating"], len(book["user_ratings"])) for book in (
+        client.get(f"/books/{book_id}").json() for book_id in book_ids
+    )] == [(book_ids[0], 4.0, 1), (book_ids[1], 5.0, 1)]
+    # Synchronous rating is back once the writer is stopped.
+    response = client.post(f"/books/{book_ids[1]}/rate", json={"rating": 1}, headers=headers)
+    assert response.status_code == 200 and response.json()["rating"] == 1.0
+
+    client.delete(f"/authors/{author_id}", headers=headers)
+
+def test_author_summaries_and_paged_bibliography():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    author_id, book_ids = create_author_with_books(headers, "Prolific Author", 5)
+    small_author_id, _ = create_author_with_books(headers, "Occasional Author", 1)
+
+    bump_catalog_version()
+    # Summaries are the default; view=full still embeds every book.
+    summaries = {
+        author["id"]: author
+        for author in client.get("/authors/?limit=1000").json()
+    }
+    assert summaries[author_id] == {
+        "name": "Prolific Author", "biography": None, "id": author_id, "book_count": 5
+    }
+    assert summaries[small_author_id]["book_count"] == 1
+    full = {
+        author["id"]: author
+        for author in client.get("/authors/?view=full&limit=1000").json()
+    }
+    assert sorted(book["id"] for book in full[author_id]["books"]) == sorted(book_ids)
+    # One statement for the page, however many books the authors have.
+    assert len(sql_for("GET", "/authors/?view=summary&limit=1000")) == 1
+
+    pages, params = [], {"limit": 2}
+    while True:
+        response = client.get(f"/authors/{author_id}/books", params=params)
+        assert response.status_code == 200
+        pages.append([book["id"] for book in response.json()])
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert pages == [book_ids[0:2], book_ids[2:4], book_ids[4:]]
+    first = client.get(f"/authors/{author_id}/books?limit=1").json()[0]
+    assert first == {
+        "title": "Prolific Author Book 0", "isbn": "Prolific Author-0", "publication_year": 2010,
+        "description": None, "id": book_ids[0], "rating": 0.0
+    }
+    titles = [book["title"] for book in client.get(f"/authors/{author_id}/books?sort=title").json()]
+    assert titles == sorted(titles)
+    assert client.get("/authors/999999/books").status_code == 404
+    assert client.get(f"/authors/{author_id}/books?limit=0").status_code == 422
+    with TestClient(create_app(use_async_db=True)) as async_client:
+        response = async_client.get(f"/authors/{author_id}/books?limit=2")
+        assert [book["id"] for book in response.json()] == book_ids[0:2]
+        assert response.headers["X-Next-Cursor"]
+
+    for sql in (
+        "SELECT id FROM books WHERE id IN (SELECT book_id FROM book_author WHERE author_id = ?) "
+        "ORDER BY id LIMIT 50",
+        "SELECT (SELECT count(*) FROM book_author WHERE author_id = ?)",
+    ):
+        plan = query_plan(sql, (author_id,))
+        assert "INDEX ix_book_author_author_id (author_id=?)" in plan
+        assert "SCAN book_author" not in plan
+
+    for deleted_author_id in (author_id, small_author_id):
+        client.delete(f"/authors/{deleted_author_id}", headers=headers)
+
+def page_query_plan(url):
+    # EXPLAIN the first statement of a listing: the page of ids picked by
+    # fetch_page. Only its part of the plan is returned, not the final sort
+    # of the (at most `limit`) loaded rows.
+    executed = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+    bump_catalog_version()
+    event.listen(read_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        assert client.get(url).status_code == 200
+    finally:
+        event.remove(read_engine, "before_cursor_execute", before_cursor_execute)
+    plan = query_plan(*executed[0])
+    return plan.split("MATERIALIZE anon_1 ", 1)[1].split(" SCAN anon_1", 1)[0]
+
+def test_book_listing_sorts_and_filters_in_sql():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    author_id = client.post("/authors/", json={"name": "Sorted Author"}, headers=headers).json()["id"]
+    other_author_id = client.post("/authors/", json={"name": "Other Sorted Author"}, headers=headers).json()["id"]
+    book_ids = [
+        client.post("/books/", json={
+            "title": f"Sorted {title}",
+            "isbn": f"SORTED-{i}",
+            "publication_year": year,
+            "author_ids": [author_id] if i < 4 else [other_author_id]
+        }, headers=headers).json()["id"]
+        for i, (title, year) in enumerate((("C", 1903), ("A", 1901), ("D", 1904), ("B", 1902), ("E", 1902)))
+    ]
+    client.post("/books/ratings:batch", json={"ratings": [
+        {"book_id": book_id, "rating": rating} for book_id, rating in zip(book_ids, (2, 5, 4, 1, 3))
+    ]}, headers=headers)
+
+    def listed(query):
+        bump_catalog_version()
+        response = client.get(f"/books/?limit=1000&{query}")
+        assert response.status_code == 200, response.text
+        return [book["id"] for book in response.json()]
+
+    c, a, d, b, e = book_ids
+    assert listed(f"author_id={author_id}") == [c, a, d, b]
+    assert listed(f"author_id={author_id}&sort=title") == [a, b, c, d]
+    assert listed(f"author_id={author_id}&sort=year") == [a, b, c, d]
+    assert listed(f"author_id={author_id}&sort=rating") == [b, c, d, a]
+    assert listed(f"author_id={author_id}&sort=-rating&view=summary") == [a, d, c, b]
+    assert listed("year_from=1902&year_to=1903&sort=year") == [b, e, c]
+    assert listed(f"author_id={author_id}&min_rating=4") == [a, d]
+    assert listed(f"author_id={other_author_id}&year_to=1901") == []
+
+    # Cursor pages keep the order and the filters.
+    pages, params = [], {"author_id": author_id, "sort": "-rating", "limit": 3}
+    while True:
+        response = client.get("/books/", params=params)
+        pages.append([book["id"] for book in response.json()])
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert pages == [[a, d, c], [b]]
+    assert client.get("/books/?min_rating=6").status_code == 422
+    assert client.get("/books/?sort=year_desc").status_code == 400
+
+    # The page of ids comes straight off an index range, already in order.
+    for url, index in (
+        ("/books/?sort=year&year_from=1902&year_to=1903", "ix_books_publication_year"),
+        ("/books/?sort=rating&view=summary", "ix_books_rating"),
+        ("/books/?sort=-rating&min_rating=4", "ix_books_rating"),
+        (f"/books/?author_id={author_id}&view=summary", "ix_book_author_author_id"),
+    ):
+        plan = page_query_plan(url)
+        assert index in plan and "TEMP B-TREE" not in plan, (url, plan)
+
+    for deleted_author_id in (author_id, other_author_id):
+        client.delete(f"/authors/{deleted_author_id}", headers=headers)
+
+def test_author_search_is_not_shadowed_by_author_routes():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    author_id = client.post("/authors/", json={
+        "name": "Shadowed Books Author", "biography": "Writes books"
+    }, headers=headers).json()["id"]
+    for app_client in (client, TestClient(create_app(use_async_db=True))):
+        response = app_client.get("/authors/search/books")
+        assert response.status_code == 200, response.text
+        assert author_id in [author["id"] for author in response.json()]
+    client.delete(f"/authors/{author_id}", headers=headers)
+
+def test_listing_page_size_is_bounded():
+    for path in ("/books/", "/authors/"):
+        for query in ("limit=0", "limit=-1", "limit=1001", "skip=-1"):
+            assert client.get(f"{path}?{query}").status_code == 422, (path, query)
+        assert client.get(f"{path}?limit=1000").status_code == 200
+    with TestClient(create_app(use_async_db=True)) as async_client:
+        assert async_client.get("/books/?limit=-1").status_code == 422
+        assert async_client.get("/authors/?limit=0").status_code == 422
@@ -0,0 +1,120 @@
+import logging
+import queue
+import threading
+import time
+from fastapi import HTTPException, status
+from metrics import write_batch_size, write_lag
+
+logger = logging.getLogger(__name__)
+
+# Write-behind buffer with group commit. Request handlers put items on a
+# bounded queue and return at once; one writer thread takes everything that
+# arrives within interval_ms (up to max_batch items), hands it to `write` in
+# a single session and commits once, so a burst of N writes costs one SQLite
+# write lock and one fsync instead of N. A full queue is refused with 503
+# rather than buffering without bound.
+class WriteBehindQueue:
+    def __init__(self, name, session_factory, write, max_size: int, max_batch: int, interval_ms: int):
+        self.name = name
+        self.session_factory = session_factory
+        self.write = write
+        self.max_batch = max_batch
+        self.interval = interval_ms / 1000
+        self._queue = queue.Queue(maxsize=max_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._accepted = 0
+        self._rejected = 0
+        self._written = 0
+        self._failed = 0
+        self._batches = 0
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        # Flushes whatever is queued before returning; called on shutdown.
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def put(self, item):
+        try:
+            self._queue.put_nowait((time.perf_counter(), item))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending writes, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            self._accepted += 1
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            batch = [entry]
+            deadline = time.perf_counter() + self.interval
+            while len(batch) < self.max_batch:
+                try:
+                    entry = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            self._flush(batch)
+        # Shutdown: drain anything still queued behind the stop marker.
+        leftovers = []
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not None:
+                leftovers.append(entry)
+        for start in range(0, len(leftovers), self.max_batch):
+            self._flush(leftovers[start:start + self.max_batch])
+
+    def _flush(self, batch):
+        try:
+            with self.session_factory() as db:
+                self.write(db, [item for _, item in batch])
+        except Exception:
+            # The items are lost; keep the writer alive for the next batch.
+            logger.exception("%s writer failed to write %d items", self.name, len(batch))
+            with self._lock:
+                self._failed += len(batch)
+            return
+        finished = time.perf_counter()
+        write_batch_size.observe((self.name,), len(batch))
+        for enqueued, _ in batch:
+            write_lag.observe((self.name,), finished - enqueued)
+        with self._lock:
+            self._written += len(batch)
+            self._batches += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_size": self._queue.maxsize,
+                "accepted": self._accepted,
+                "rejected": self._rejected,
+                "written": self._written,
+                "failed": self._failed,
+                "batches": self._batches,
+            }